@@ -7,19 +7,31 @@ PDF OCR工具打包脚本
 
 import os
 import sys
-import shutil
-import subprocess
+import argparse
 import platform
+import functools
+from collections import deque
+from datetime import datetime
 from pathlib import Path
 
+# 复制缓冲区大小（1MB），减少大文件复制时的读写次数
+COPY_BUFSIZE = 1024 * 1024
+
+# 系统信息在进程内不会变化，导入时获取一次
+SYSTEM = platform.system().lower()
+ARCH = platform.machine().lower()
+PYTHON_VERSION = sys.version
+
 def get_system_info():
     """获取系统信息"""
-    system = platform.system().lower()
-    arch = platform.machine().lower()
-    return system, arch
+    return SYSTEM, ARCH
 
+@functools.lru_cache(maxsize=1)
 def find_tesseract():
-    """查找Tesseract安装路径"""
+    """查找Tesseract安装路径（结果会被缓存）"""
+    import shutil
+    import subprocess
+    
     tesseract_cmd = shutil.which('tesseract')
     if not tesseract_cmd:
         print("错误: 未找到Tesseract，请先安装Tesseract OCR")
@@ -36,11 +48,14 @@ def find_tesseract():
         'C:\\Program Files (x86)\\Tesseract-OCR\\tessdata'  # Windows 32位
     ]
     
-    tessdata_path = None
-    for path in possible_tessdata_paths:
-        if os.path.exists(path):
-            tessdata_path = path
-            break
+    # 优先使用环境变量，其次检查常见路径
+    env_tessdata = os.environ.get('TESSDATA_PREFIX')
+    if env_tessdata and os.path.exists(env_tessdata):
+        tessdata_path = env_tessdata
+    else:
+        tessdata_path = next(
+            (path for path in possible_tessdata_paths if os.path.exists(path)), None
+        )
     
     if not tessdata_path:
         # 尝试通过tesseract命令获取
@@ -60,39 +75,137 @@ def find_tesseract():
     
     if tessdata_path:
         print(f"找到tessdata: {tessdata_path}")
+        os.environ.setdefault('TESSDATA_PREFIX', tessdata_path)
     else:
         print("警告: 未找到tessdata目录")
     
     return tesseract_cmd, tessdata_path
 
+def _fastcopy(src, dst):
+    """复制文件，优先使用内核零拷贝接口
+    
+    依次尝试 CopyFileExW (Windows)、copy_file_range、sendfile，
+    均不可用时回退到大缓冲区的复制循环，最后复制文件元数据。
+    
+    Args:
+        src: 源文件路径
+        dst: 目标文件路径（如果是目录则复制到该目录下）
+    """
+    import shutil
+    
+    src = str(src)
+    dst = str(dst)
+    if os.path.isdir(dst):
+        dst = os.path.join(dst, os.path.basename(src))
+    
+    if sys.platform == 'win32':
+        import ctypes
+        if ctypes.windll.kernel32.CopyFileExW(src, dst, None, None, None, 0):
+            shutil.copystat(src, dst)
+            return dst
+    
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        in_fd, out_fd = fsrc.fileno(), fdst.fileno()
+        remaining = os.fstat(in_fd).st_size
+        
+        fast_copies = []
+        if hasattr(os, 'copy_file_range'):
+            fast_copies.append(lambda count: os.copy_file_range(in_fd, out_fd, count))
+        if hasattr(os, 'sendfile'):
+            fast_copies.append(lambda count: os.sendfile(out_fd, in_fd, None, count))
+        
+        for fast_copy in fast_copies:
+            try:
+                while remaining > 0:
+                    copied = fast_copy(remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+                break
+            except OSError:
+                # 当前文件系统不支持该接口，从已复制位置继续尝试下一种方式
+                continue
+        
+        if remaining > 0:
+            shutil.copyfileobj(fsrc, fdst, length=COPY_BUFSIZE)
+    
+    shutil.copystat(src, dst)
+    return dst
+
 def clean_build_dirs():
-    """清理构建目录"""
+    """清理构建目录
+    
+    目录先被重命名移走，再在后台线程中删除，打包可以立即开始。
+    
+    Returns:
+        后台删除线程列表
+    """
+    import shutil
+    import threading
+    
     dirs_to_clean = ['build', 'dist', '__pycache__']
+    threads = []
     for dir_name in dirs_to_clean:
         if os.path.exists(dir_name):
             print(f"清理目录: {dir_name}")
-            shutil.rmtree(dir_name)
+            trash_dir = f"{dir_name}.trash.{os.getpid()}"
+            try:
+                os.replace(dir_name, trash_dir)
+            except OSError:
+                # 无法重命名（如文件被占用）时直接同步删除
+                shutil.rmtree(dir_name)
+                continue
+            thread = threading.Thread(target=shutil.rmtree, args=(trash_dir,), daemon=False)
+            thread.start()
+            threads.append(thread)
+    return threads
 
-def run_pyinstaller():
-    """运行PyInstaller打包"""
+def run_pyinstaller(fresh=False):
+    """运行PyInstaller打包
+    
+    Args:
+        fresh: 是否清理PyInstaller缓存后完整重新构建
+    """
+    import subprocess
+    
     print("开始PyInstaller打包...")
     
+    log_path = Path('build') / 'pyinstaller.log'
+    log_path.parent.mkdir(exist_ok=True)
+    
     try:
-        # 运行PyInstaller
-        cmd = ['pyinstaller', 'pdf_ocr.spec', '--clean']
-        result = subprocess.run(cmd, check=True, capture_output=True, text=True)
-        print("PyInstaller打包完成")
+        # 运行PyInstaller（默认复用缓存进行增量构建）
+        cmd = ['pyinstaller', 'pdf_ocr.spec', '--noconfirm']
+        if fresh:
+            cmd.append('--clean')
+        # 输出直接写入日志文件，避免在内存中缓存大量输出
+        with open(log_path, 'wb') as log:
+            subprocess.run(cmd, check=True, stdout=log, stderr=subprocess.STDOUT)
+        print(f"PyInstaller打包完成，日志: {log_path}")
         return True
     except subprocess.CalledProcessError as e:
         print(f"PyInstaller打包失败: {e}")
-        print(f"错误输出: {e.stderr}")
+        with open(log_path, 'r', encoding='utf-8', errors='replace') as log:
+            print(f"错误输出 ({log_path}):")
+            print(''.join(deque(log, maxlen=20)))
         return False
     except FileNotFoundError:
         print("错误: 未找到PyInstaller，请先安装: pip install pyinstaller")
         return False
 
+def _resolve_dist_dir():
+    """获取打包输出目录（单文件打包时为pdf_ocr_package）"""
+    package_dir = Path('dist/pdf_ocr_package')
+    return package_dir if package_dir.exists() else Path('dist/pdf_ocr')
+
 def copy_additional_files():
-    """复制额外的文件到dist目录"""
+    """复制额外的文件到dist目录
+    
+    Returns:
+        打包输出目录，失败时返回None
+    """
+    import shutil
+    
     # 检查是否是单文件可执行文件
     exe_file = Path('dist/pdf_ocr')
     if exe_file.is_file():
@@ -109,7 +222,7 @@ def copy_additional_files():
         dist_dir = Path('dist/pdf_ocr')
         if not dist_dir.exists():
             print("错误: dist目录不存在")
-            return False
+            return None
     
     # 复制配置文件
     files_to_copy = [
@@ -119,7 +232,7 @@ def copy_additional_files():
     
     for file_name in files_to_copy:
         if os.path.exists(file_name):
-            shutil.copy2(file_name, dist_dir)
+            _fastcopy(file_name, dist_dir)
             print(f"复制文件: {file_name}")
     
     # 创建示例目录
@@ -128,15 +241,20 @@ def copy_additional_files():
     
     # 如果有示例PDF文件，复制它
     if os.path.exists('input.pdf'):
-        shutil.copy2('input.pdf', examples_dir / 'sample.pdf')
+        _fastcopy('input.pdf', examples_dir / 'sample.pdf')
         print("复制示例PDF文件")
     
-    return True
+    return dist_dir
 
-def create_run_scripts():
-    """创建运行脚本"""
+def create_run_scripts(dist_dir=None):
+    """创建运行脚本
+    
+    Args:
+        dist_dir: 打包输出目录，默认自动检测
+    """
     # 使用正确的dist目录
-    dist_dir = Path('dist/pdf_ocr_package') if Path('dist/pdf_ocr_package').exists() else Path('dist/pdf_ocr')
+    if dist_dir is None:
+        dist_dir = _resolve_dist_dir()
     system, _ = get_system_info()
     
     if system == 'windows':
@@ -166,10 +284,17 @@ echo
         os.chmod(script_path, 0o755)
         print("创建Unix运行脚本: run.sh")
 
-def test_executable():
-    """测试可执行文件"""
+def test_executable(dist_dir=None):
+    """测试可执行文件
+    
+    Args:
+        dist_dir: 打包输出目录，默认自动检测
+    """
+    import subprocess
+    
     # 使用正确的dist目录
-    dist_dir = Path('dist/pdf_ocr_package') if Path('dist/pdf_ocr_package').exists() else Path('dist/pdf_ocr')
+    if dist_dir is None:
+        dist_dir = _resolve_dist_dir()
     system, _ = get_system_info()
     
     if system == 'windows':
@@ -185,13 +310,15 @@ def test_executable():
     
     try:
         # 测试帮助信息
+        # 只关心返回码，丢弃帮助文本；错误输出只保留末尾部分
         result = subprocess.run([str(exe_path), '--help'], 
-                              capture_output=True, text=True, timeout=30)
+                              stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=30)
         if result.returncode == 0:
             print("✓ 可执行文件测试通过")
             return True
         else:
-            print(f"✗ 可执行文件测试失败: {result.stderr}")
+            stderr_tail = result.stderr[-4096:].decode('utf-8', errors='replace')
+            print(f"✗ 可执行文件测试失败: {stderr_tail}")
             return False
     except subprocess.TimeoutExpired:
         print("✗ 可执行文件测试超时")
@@ -200,18 +327,23 @@ def test_executable():
         print(f"✗ 可执行文件测试出错: {e}")
         return False
 
-def create_package_info():
-    """创建打包信息文件"""
+def create_package_info(dist_dir=None):
+    """创建打包信息文件
+    
+    Args:
+        dist_dir: 打包输出目录，默认自动检测
+    """
     # 使用正确的dist目录
-    dist_dir = Path('dist/pdf_ocr_package') if Path('dist/pdf_ocr_package').exists() else Path('dist/pdf_ocr')
+    if dist_dir is None:
+        dist_dir = _resolve_dist_dir()
     system, arch = get_system_info()
     
     info_content = f'''PDF OCR工具 - 打包信息
 
-构建时间: {subprocess.run(['date'], capture_output=True, text=True).stdout.strip()}
+构建时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 系统平台: {system}
 系统架构: {arch}
-Python版本: {sys.version}
+Python版本: {PYTHON_VERSION}
 
 使用说明:
 1. 将PDF文件放在同一目录下
@@ -234,8 +366,23 @@ Python版本: {sys.version}
         f.write(info_content)
     print("创建打包信息文件")
 
+def create_parser():
+    """创建命令行参数解析器"""
+    parser = argparse.ArgumentParser(
+        description="PDF OCR工具打包脚本",
+        epilog="默认进行增量构建；如缓存异常，可使用 --fresh 或手动删除 build/ 和 dist/ 目录"
+    )
+    parser.add_argument(
+        '--fresh',
+        action='store_true',
+        help='清理构建目录和PyInstaller缓存后完整重新构建'
+    )
+    return parser
+
 def main():
     """主函数"""
+    args = create_parser().parse_args()
+    
     print("=== PDF OCR工具打包脚本 ===")
     print()
     
@@ -253,28 +400,33 @@ def main():
     if not tesseract_cmd:
         sys.exit(1)
     
-    # 清理构建目录
-    clean_build_dirs()
+    # 清理构建目录（仅在完整重新构建时）
+    cleanup_threads = clean_build_dirs() if args.fresh else []
     
     # 运行PyInstaller
-    if not run_pyinstaller():
+    if not run_pyinstaller(fresh=args.fresh):
         sys.exit(1)
     
-    # 复制额外文件
-    if not copy_additional_files():
+    # 复制额外文件，并确定打包输出目录
+    dist_dir = copy_additional_files()
+    if not dist_dir:
         sys.exit(1)
     
     # 创建运行脚本
-    create_run_scripts()
+    create_run_scripts(dist_dir)
     
     # 创建打包信息
-    create_package_info()
+    create_package_info(dist_dir)
+    
+    # 等待后台清理完成
+    for thread in cleanup_threads:
+        thread.join()
     
     # 测试可执行文件
-    if test_executable():
+    if test_executable(dist_dir):
         print()
         print("🎉 打包完成！")
-        package_dir = 'dist/pdf_ocr_package' if Path('dist/pdf_ocr_package').exists() else 'dist/pdf_ocr'
+        package_dir = dist_dir.as_posix()
         print(f"可执行文件位置: {package_dir}/")
         print(f"系统平台: {system} ({arch})")
         print()
@@ -6,23 +6,51 @@
 
 import os
 import sys
+import argparse
 import platform
-import subprocess
+from collections import deque
 from pathlib import Path
 
+# 系统名称 -> spec文件名中的平台标识（PyInstaller只能构建当前平台的可执行文件）
+PLATFORM_SPEC_NAMES = {'darwin': 'macos', 'windows': 'windows', 'linux': 'linux'}
+
+# 系统信息在进程内不会变化，导入时获取一次
+SYSTEM = platform.system().lower()
+MACHINE = platform.machine().lower()
+PYTHON_VERSION = sys.version
+
 def get_platform_info():
     """获取平台信息"""
-    system = platform.system().lower()
-    machine = platform.machine().lower()
+    print(f"操作系统: {SYSTEM}")
+    print(f"架构: {MACHINE}")
+    print(f"Python版本: {PYTHON_VERSION}")
     
-    print(f"操作系统: {system}")
-    print(f"架构: {machine}")
-    print(f"Python版本: {sys.version}")
-    
-    return system, machine
+    return SYSTEM, MACHINE
+
+def _log_path(spec_file):
+    """获取spec文件对应的PyInstaller日志路径"""
+    log_dir = Path('build')
+    log_dir.mkdir(exist_ok=True)
+    return log_dir / f"pyinstaller-{Path(spec_file).stem}.log"
 
-def build_for_current_platform():
-    """为当前平台构建可执行文件"""
+def _print_log_tail(log_path, lines=20):
+    """打印日志文件的最后几行"""
+    try:
+        with open(log_path, 'r', encoding='utf-8', errors='replace') as f:
+            tail = deque(f, maxlen=lines)
+    except OSError:
+        return
+    print(f"日志末尾 ({log_path}):")
+    print(''.join(tail))
+
+def build_for_current_platform(fresh=False):
+    """为当前平台构建可执行文件
+    
+    Args:
+        fresh: 是否清理PyInstaller缓存后完整重新构建
+    """
+    import subprocess
+    
     system, machine = get_platform_info()
     
     # 选择合适的spec文件
@@ -47,29 +75,158 @@ def build_for_current_platform():
     # 执行PyInstaller
     try:
         print(f"\n开始打包，使用配置文件: {spec_file}")
-        cmd = ['pyinstaller', spec_file, '--clean', '--noconfirm']
+        # 默认复用PyInstaller缓存进行增量构建，--fresh时才清理缓存
+        cmd = ['pyinstaller', spec_file, '--noconfirm']
+        if fresh:
+            cmd.append('--clean')
         print(f"执行命令: {' '.join(cmd)}")
         
-        result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+        # 输出直接写入日志文件，避免在内存中缓存大量输出
+        log_path = _log_path(spec_file)
+        with open(log_path, 'wb') as log:
+            subprocess.run(cmd, check=True, stdout=log, stderr=subprocess.STDOUT)
         
         print("\n打包成功!")
-        print("输出:")
-        print(result.stdout)
+        print(f"构建日志: {log_path}")
         
         return True
         
     except subprocess.CalledProcessError as e:
         print(f"\n打包失败: {e}")
-        print("错误输出:")
-        print(e.stderr)
+        _print_log_tail(log_path)
         return False
     except FileNotFoundError:
         print("\n错误: 未找到pyinstaller命令")
         print("请先安装PyInstaller: pip install pyinstaller")
         return False
 
+def _current_platform_specs():
+    """查找当前平台的所有spec文件（如 pdf_ocr_linux.spec、pdf_ocr_linux_cli.spec）
+    
+    Returns:
+        spec文件路径列表
+    """
+    platform_name = PLATFORM_SPEC_NAMES.get(SYSTEM)
+    if platform_name is None:
+        return []
+    return sorted(str(spec) for spec in Path('.').glob(f"pdf_ocr_{platform_name}*.spec"))
+
+def _run_spec_build(spec_file, fresh=False):
+    """使用独立的PyInstaller配置目录、工作目录和输出目录构建单个spec文件
+    
+    Args:
+        spec_file: spec配置文件路径
+        fresh: 是否清理PyInstaller缓存后完整重新构建
+        
+    Returns:
+        构建日志路径
+    """
+    import subprocess
+    import tempfile
+    
+    # 每个任务使用独立的配置目录，避免并行构建时缓存互相冲突
+    env = os.environ.copy()
+    env['PYINSTALLER_CONFIG_DIR'] = os.path.join(
+        tempfile.gettempdir(), f"pyi-config-{Path(spec_file).stem}"
+    )
+    
+    # 各任务的中间文件和输出分别放在 build/<spec名>、dist/<spec名>，互不覆盖
+    stem = Path(spec_file).stem
+    cmd = [
+        'pyinstaller', spec_file, '--noconfirm',
+        '--workpath', os.path.join('build', stem),
+        '--distpath', os.path.join('dist', stem),
+    ]
+    if fresh:
+        cmd.append('--clean')
+    
+    log_path = _log_path(spec_file)
+    with open(log_path, 'wb') as log:
+        subprocess.run(cmd, env=env, check=True, stdout=log, stderr=subprocess.STDOUT)
+    return log_path
+
+def build_all_platforms(fresh=False, max_workers=None):
+    """并行构建当前平台的所有spec文件
+    
+    PyInstaller无法交叉编译，只构建与当前操作系统对应的spec文件。
+    
+    Args:
+        fresh: 是否清理PyInstaller缓存后完整重新构建
+        max_workers: 最大并行任务数，默认为spec文件数
+        
+    Returns:
+        是否全部构建成功
+    """
+    import subprocess
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    
+    system, _ = get_platform_info()
+    
+    spec_files = _current_platform_specs()
+    if not spec_files:
+        platform_name = PLATFORM_SPEC_NAMES.get(system)
+        if platform_name is None:
+            print(f"\n不支持的平台: {system}")
+        else:
+            print(f"错误: 未找到当前平台的配置文件: pdf_ocr_{platform_name}*.spec")
+        return False
+    
+    print(f"\n开始并行打包，共 {len(spec_files)} 个配置文件: {', '.join(spec_files)}")
+    
+    with ThreadPoolExecutor(max_workers=max_workers or len(spec_files)) as executor:
+        future_to_spec = {
+            executor.submit(_run_spec_build, spec, fresh): spec
+            for spec in spec_files
+        }
+        
+        for future in as_completed(future_to_spec):
+            spec_file = future_to_spec[future]
+            try:
+                log_path = future.result()
+                print(f"✓ 打包成功: {spec_file} (日志: {log_path})")
+            except subprocess.CalledProcessError as e:
+                print(f"\n✗ 打包失败: {spec_file}: {e}")
+                _print_log_tail(_log_path(spec_file))
+                # 任一任务失败时取消尚未开始的任务
+                for pending in future_to_spec:
+                    pending.cancel()
+                return False
+            except FileNotFoundError:
+                print("\n错误: 未找到pyinstaller命令")
+                print("请先安装PyInstaller: pip install pyinstaller")
+                for pending in future_to_spec:
+                    pending.cancel()
+                return False
+    
+    return True
+
+def create_parser():
+    """创建命令行参数解析器"""
+    parser = argparse.ArgumentParser(
+        description="PDF OCR工具 - 跨平台打包脚本",
+        epilog="默认进行增量构建；如缓存异常，可使用 --fresh 或手动删除 build/ 和 dist/ 目录"
+    )
+    parser.add_argument(
+        '--fresh',
+        action='store_true',
+        help='清理PyInstaller缓存后完整重新构建（传递 --clean）'
+    )
+    parser.add_argument(
+        '--all',
+        action='store_true',
+        help='并行构建当前平台的所有spec配置文件（适用于构建机，PyInstaller无法交叉编译）'
+    )
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        help='并行构建的任务数（默认为spec文件数）'
+    )
+    return parser
+
 def main():
     """主函数"""
+    args = create_parser().parse_args()
+    
     print("PDF OCR工具 - 跨平台打包脚本")
     print("=" * 40)
     
@@ -79,21 +236,26 @@ def main():
         sys.exit(1)
     
     # 开始打包
-    success = build_for_current_platform()
+    if args.all:
+        success = build_all_platforms(fresh=args.fresh, max_workers=args.jobs)
+    else:
+        success = build_for_current_platform(fresh=args.fresh)
     
     if success:
         print("\n✅ 打包完成!")
         print("\n可执行文件位置:")
         
         # 查找生成的可执行文件
-        dist_dir = Path('dist')
-        if dist_dir.exists():
-            for item in dist_dir.iterdir():
-                if item.is_dir():
-                    print(f"  📁 {item}")
-                    exe_files = list(item.glob('pdf_ocr*'))
-                    for exe in exe_files:
-                        print(f"    🚀 {exe}")
+        dist_dir = 'dist'
+        if os.path.isdir(dist_dir):
+            with os.scandir(dist_dir) as items:
+                for item in items:
+                    if item.is_dir():
+                        print(f"  📁 {item.path}")
+                        with os.scandir(item.path) as entries:
+                            for entry in entries:
+                                if entry.name.startswith('pdf_ocr'):
+                                    print(f"    🚀 {entry.path}")
         
         print("\n使用说明:")
         print("1. 进入dist目录中的对应文件夹")
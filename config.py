@@ -9,10 +9,46 @@ import json
 import os
 from typing import Dict, Any
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 
 class Config:
     """配置管理类"""
     
+    # 常用配置项，加载和修改配置时预先计算为普通属性，避免每次访问都查找字典
+    ocr_language: str  # OCR识别语言
+    ocr_dpi: int  # OCR图片DPI
+    confidence_threshold: int  # 置信度阈值
+    tesseract_threads: int  # 每个Tesseract进程的线程数
+    binarize: bool  # 是否二值化
+    output_format: str  # 输出格式
+    output_directory: str  # 输出目录
+    preserve_formatting: bool  # 是否保持格式
+    image_format: str  # 保存转换后图片的格式 (png/png_fast/jpeg/webp)
+    max_workers: int  # 最大工作线程数
+    temp_directory: str  # 临时目录
+    cleanup_temp: bool  # 是否清理临时文件
+    
+    # 属性名 -> (配置段名, 配置键名, 默认值)
+    ATTRIBUTES = {
+        "ocr_language": ("ocr", "language", "chi_sim+eng"),
+        "ocr_dpi": ("ocr", "dpi", 300),
+        "confidence_threshold": ("ocr", "confidence_threshold", 60),
+        "tesseract_threads": ("ocr", "tesseract_threads", 1),
+        "binarize": ("ocr", "binarize", True),
+        "output_format": ("output", "format", "txt"),
+        "output_directory": ("output", "output_directory", "./output"),
+        "preserve_formatting": ("output", "preserve_formatting", True),
+        "image_format": ("output", "image_format", "png"),
+        "max_workers": ("processing", "max_workers", 4),
+        "temp_directory": ("processing", "temp_directory", "./temp"),
+        "cleanup_temp": ("processing", "cleanup_temp", True),
+    }
+    
     def __init__(self, config_file: str = "config.json"):
         """初始化配置
         
@@ -22,6 +58,7 @@ class Config:
         self.config_file = config_file
         self.config = self._load_default_config()
         self._load_config()
+        self._refresh_attributes()
     
     def _load_default_config(self) -> Dict[str, Any]:
         """加载默认配置
@@ -33,11 +70,14 @@ class Config:
             "ocr": {
                 "language": "chi_sim+eng",
                 "dpi": 300,
-                "confidence_threshold": 60
+                "confidence_threshold": 60,
+                "tesseract_threads": 1,
+                "binarize": True
             },
             "output": {
                 "format": "txt",
                 "preserve_formatting": True,
+                "image_format": "png",
                 "output_directory": "./output"
             },
             "processing": {
@@ -51,9 +91,13 @@ class Config:
         """从文件加载配置"""
         if os.path.exists(self.config_file):
             try:
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    file_config = json.load(f)
-                    self._merge_config(file_config)
+                if ORJSON_AVAILABLE:
+                    with open(self.config_file, 'rb') as f:
+                        file_config = orjson.loads(f.read())
+                else:
+                    with open(self.config_file, 'r', encoding='utf-8') as f:
+                        file_config = json.load(f)
+                self._merge_config(file_config)
             except (json.JSONDecodeError, IOError) as e:
                 print(f"警告: 配置文件加载失败，使用默认配置: {e}")
     
@@ -64,17 +108,31 @@ class Config:
             file_config: 文件中的配置
         """
         for section, values in file_config.items():
-            if section in self.config and isinstance(values, dict):
-                self.config[section].update(values)
+            base = self.config.get(section)
+            if isinstance(values, dict) and isinstance(base, dict):
+                base |= values
             else:
                 self.config[section] = values
     
+    def _refresh_attributes(self):
+        """根据当前配置更新常用配置项属性"""
+        for name, (section, key, default) in self.ATTRIBUTES.items():
+            setattr(self, name, self.get(section, key, default))
+    
     def save_config(self):
         """保存配置到文件"""
         try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(self.config, f, indent=2, ensure_ascii=False)
-        except IOError as e:
+            # 先完整序列化，再一次性写入临时文件并原子替换
+            if ORJSON_AVAILABLE:
+                data = orjson.dumps(self.config, option=orjson.OPT_INDENT_2)
+            else:
+                data = json.dumps(self.config, indent=2, ensure_ascii=False).encode('utf-8')
+            
+            tmp_file = f"{self.config_file}.tmp"
+            with open(tmp_file, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_file, self.config_file)
+        except (IOError, TypeError) as e:
             print(f"错误: 配置文件保存失败: {e}")
     
     def get(self, section: str, key: str = None, default=None):
@@ -108,51 +166,7 @@ class Config:
             self.config[section] = {}
         
         self.config[section][key] = value
-    
-    @property
-    def ocr_language(self) -> str:
-        """OCR识别语言"""
-        return self.get("ocr", "language", "chi_sim+eng")
-    
-    @property
-    def ocr_dpi(self) -> int:
-        """OCR图片DPI"""
-        return self.get("ocr", "dpi", 300)
-    
-    @property
-    def confidence_threshold(self) -> int:
-        """置信度阈值"""
-        return self.get("ocr", "confidence_threshold", 60)
-    
-    @property
-    def output_format(self) -> str:
-        """输出格式"""
-        return self.get("output", "format", "txt")
-    
-    @property
-    def output_directory(self) -> str:
-        """输出目录"""
-        return self.get("output", "output_directory", "./output")
-    
-    @property
-    def preserve_formatting(self) -> bool:
-        """是否保持格式"""
-        return self.get("output", "preserve_formatting", True)
-    
-    @property
-    def max_workers(self) -> int:
-        """最大工作线程数"""
-        return self.get("processing", "max_workers", 4)
-    
-    @property
-    def temp_directory(self) -> str:
-        """临时目录"""
-        return self.get("processing", "temp_directory", "./temp")
-    
-    @property
-    def cleanup_temp(self) -> bool:
-        """是否清理临时文件"""
-        return self.get("processing", "cleanup_temp", True)
+        self._refresh_attributes()
 
 
 # 全局配置实例
@@ -7,8 +7,57 @@ Windows平台专用配置文件
 
 import os
 import sys
+import functools
 from pathlib import Path
 
+
+def _list_directory(directory):
+    """列出目录中的条目名称
+    
+    Args:
+        directory: 目录路径
+        
+    Returns:
+        条目名称集合（按平台规则规范大小写），目录不存在时为空集合
+    """
+    try:
+        with os.scandir(directory) as entries:
+            return frozenset(os.path.normcase(entry.name) for entry in entries)
+    except OSError:
+        return frozenset()
+
+
+@functools.lru_cache(maxsize=None)
+def _list_install_directory(directory):
+    """列出安装路径候选所在的目录（结果会被缓存，只用于查找安装路径）
+    
+    Args:
+        directory: 目录路径
+        
+    Returns:
+        条目名称集合，同 _list_directory
+    """
+    return _list_directory(directory)
+
+
+def _find_existing(candidates):
+    """查找第一个存在的路径
+    
+    同一父目录下的候选路径只需列出一次目录，而不是逐个stat。
+    
+    Args:
+        candidates: 候选路径列表
+        
+    Returns:
+        第一个存在的路径，均不存在时返回None
+    """
+    for candidate in candidates:
+        candidate = Path(candidate)
+        if os.path.normcase(candidate.name) in _list_install_directory(str(candidate.parent)):
+            return candidate
+    return None
+
+
 class WindowsConfig:
     """Windows平台配置类"""
     
@@ -28,26 +77,18 @@ class WindowsConfig:
     
     def _get_tesseract_path(self):
         """获取Tesseract路径"""
-        # 打包后的路径
-        bundled_path = self.base_dir / "tesseract" / "tesseract.exe"
-        if bundled_path.exists():
-            return str(bundled_path)
-        
-        # 开发环境路径
-        dev_path = self.base_dir / "tesseract-win64" / "tesseract.exe"
-        if dev_path.exists():
-            return str(dev_path)
-        
-        # 系统安装路径
-        system_paths = [
+        tesseract_path = _find_existing([
+            # 打包后的路径
+            self.base_dir / "tesseract" / "tesseract.exe",
+            # 开发环境路径
+            self.base_dir / "tesseract-win64" / "tesseract.exe",
+            # 系统安装路径
             r"C:\Program Files\Tesseract-OCR\tesseract.exe",
             r"C:\Program Files (x86)\Tesseract-OCR\tesseract.exe",
             r"C:\tesseract\tesseract.exe",
-        ]
-        
-        for path in system_paths:
-            if Path(path).exists():
-                return path
+        ])
+        if tesseract_path:
+            return str(tesseract_path)
         
         # 从PATH环境变量查找
         import shutil
@@ -59,22 +100,15 @@ class WindowsConfig:
     
     def _get_poppler_path(self):
         """获取Poppler路径"""
-        # 打包后的路径
-        bundled_path = self.base_dir / "poppler" / "bin"
-        if bundled_path.exists():
-            return str(bundled_path)
-        
-        # 开发环境路径
-        dev_path = self.base_dir / "poppler-win64" / "Library" / "bin"
-        if dev_path.exists():
-            return str(dev_path)
-        
-        # 备用路径
-        alt_dev_path = self.base_dir / "poppler-win64" / "bin"
-        if alt_dev_path.exists():
-            return str(alt_dev_path)
-        
-        return None
+        poppler_path = _find_existing([
+            # 打包后的路径
+            self.base_dir / "poppler" / "bin",
+            # 开发环境路径
+            self.base_dir / "poppler-win64" / "Library" / "bin",
+            # 备用路径
+            self.base_dir / "poppler-win64" / "bin",
+        ])
+        return str(poppler_path) if poppler_path else None
     
     def setup_environment(self):
         """设置环境变量"""
@@ -127,12 +161,14 @@ class WindowsConfig:
             if not tessdata_dir.exists():
                 errors.append(f"Tessdata目录未找到: {tessdata_dir}")
             else:
-                # 检查语言文件
+                # 检查语言文件（每次验证都重新列出目录，反映之后安装的语言文件）
                 required_files = ['eng.traineddata', 'chi_sim.traineddata']
-                for lang_file in required_files:
-                    lang_path = tessdata_dir / lang_file
-                    if not lang_path.exists():
-                        errors.append(f"语言文件未找到: {lang_path}")
+                present_files = _list_directory(str(tessdata_dir))
+                errors.extend(
+                    f"语言文件未找到: {tessdata_dir / lang_file}"
+                    for lang_file in required_files
+                    if os.path.normcase(lang_file) not in present_files
+                )
         
         return errors
 
@@ -7,28 +7,147 @@ Windows依赖下载脚本
 
 import os
 import sys
-import urllib.request
-import zipfile
-import shutil
 from pathlib import Path
 
+# 复制缓冲区大小（1MB），减少大文件复制时的读写次数
+COPY_BUFSIZE = 1024 * 1024
+
+# 下载缓存目录，按URL的哈希值存放已下载的文件
+CACHE_DIR = Path.home() / ".cache" / "pdf_ocr_deps"
+
+# Poppler下载地址及其SHA256校验值
+# 校验值须与POPPLER_URL指向的发布包一致（更新版本时一并更新）；
+# 未填写时仍可下载，但只校验缓存与首次下载的内容一致
+POPPLER_URL = "https://github.com/oschwartz10612/poppler-windows/releases/download/v23.01.0-0/Release-23.01.0-0.zip"
+POPPLER_SHA256 = ""
+
 def download_file(url, filename):
     """下载文件"""
+    import shutil
+    import urllib.request
+    
     print(f"正在下载: {filename}")
     try:
-        urllib.request.urlretrieve(url, filename)
+        with urllib.request.urlopen(url) as response, open(filename, 'wb') as f:
+            # 已知文件大小时预先分配空间
+            content_length = response.headers.get('Content-Length')
+            expected_size = int(content_length) if content_length else None
+            if expected_size:
+                f.truncate(expected_size)
+            
+            shutil.copyfileobj(response, f, length=COPY_BUFSIZE)
+            
+            downloaded_size = f.tell()
+            if expected_size is not None and downloaded_size != expected_size:
+                raise IOError(f"下载不完整: {downloaded_size}/{expected_size} 字节")
+        
         print(f"下载完成: {filename}")
         return True
     except Exception as e:
         print(f"下载失败: {e}")
+        # 删除不完整的文件，避免被误用
+        if os.path.exists(filename):
+            os.remove(filename)
         return False
 
+def file_sha256(path):
+    """计算文件的SHA256值"""
+    import hashlib
+    
+    digest = hashlib.sha256()
+    buffer = memoryview(bytearray(COPY_BUFSIZE))
+    with open(path, 'rb') as f:
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            digest.update(buffer[:n])
+    return digest.hexdigest()
+
+def download_cached(url, expected_sha256=None):
+    """下载文件并缓存，缓存命中且校验通过时跳过下载
+    
+    每次下载后在缓存旁记录文件的SHA256，复用缓存前重新校验。
+    
+    Args:
+        url: 下载地址
+        expected_sha256: 期望的SHA256值，为空时以首次下载时记录的值校验缓存
+        
+    Returns:
+        缓存文件路径，失败时返回None
+    """
+    import hashlib
+    
+    pinned_sha256 = expected_sha256.lower() if expected_sha256 else None
+    
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    cached_path = CACHE_DIR / hashlib.sha256(url.encode()).hexdigest()
+    digest_path = cached_path.with_suffix(".sha256")
+    
+    if cached_path.exists():
+        recorded_sha256 = digest_path.read_text().strip() if digest_path.exists() else None
+        expected = pinned_sha256 or recorded_sha256
+        if expected and file_sha256(cached_path) == expected:
+            print(f"使用缓存文件: {cached_path}")
+            return cached_path
+        print(f"缓存文件校验失败，重新下载: {cached_path}")
+        cached_path.unlink()
+    
+    # 先下载到临时文件，校验通过后再放入缓存
+    partial_path = cached_path.with_suffix(".part")
+    if not download_file(url, str(partial_path)):
+        return None
+    
+    actual_sha256 = file_sha256(partial_path)
+    if pinned_sha256 is None:
+        print(f"警告: 未配置SHA256校验值，无法验证下载内容 (SHA256: {actual_sha256})")
+    elif actual_sha256 != pinned_sha256:
+        print(f"SHA256校验失败: 期望 {pinned_sha256}, 实际 {actual_sha256}")
+        partial_path.unlink()
+        return None
+    
+    os.replace(partial_path, cached_path)
+    digest_path.write_text(actual_sha256)
+    return cached_path
+
 def extract_zip(zip_path, extract_to):
     """解压ZIP文件"""
+    import zipfile
+    
     print(f"正在解压: {zip_path}")
     try:
-        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            zip_ref.extractall(extract_to)
+        extract_root = os.path.realpath(extract_to)
+        # 所有成员复用同一块缓冲区，避免每次读取都分配新的bytes对象
+        buffer = memoryview(bytearray(COPY_BUFSIZE))
+        with open(zip_path, 'rb') as zip_file, zipfile.ZipFile(zip_file, 'r') as zip_ref:
+            # 提示内核按顺序预读压缩包
+            if hasattr(os, 'posix_fadvise'):
+                os.posix_fadvise(zip_file.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            
+            for member in zip_ref.infolist():
+                target = os.path.realpath(os.path.join(extract_root, member.filename))
+                # 跳过试图写到解压目录之外的条目
+                if os.path.commonpath([extract_root, target]) != extract_root:
+                    print(f"跳过不安全的路径: {member.filename}")
+                    continue
+                
+                if member.is_dir():
+                    os.makedirs(target, exist_ok=True)
+                    continue
+                
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with zip_ref.open(member) as src, open(target, 'wb') as dst:
+                    # 预先分配连续空间，减少文件碎片
+                    if hasattr(os, 'posix_fallocate') and member.file_size > 0:
+                        try:
+                            os.posix_fallocate(dst.fileno(), 0, member.file_size)
+                        except OSError:
+                            pass
+                    while True:
+                        n = src.readinto(buffer)
+                        if not n:
+                            break
+                        dst.write(buffer[:n])
         print(f"解压完成: {extract_to}")
         return True
     except Exception as e:
@@ -58,15 +177,15 @@ def download_tesseract():
 
 def download_poppler():
     """下载Poppler Windows版本"""
+    import shutil
+    
     print("\n=== 下载Poppler Windows版本 ===")
     
-    # Poppler Windows版本
-    poppler_url = "https://github.com/oschwartz10612/poppler-windows/releases/download/v23.01.0-0/Release-23.01.0-0.zip"
-    poppler_zip = "poppler-windows.zip"
     poppler_dir = Path("poppler-win64")
     
-    # 下载Poppler
-    if download_file(poppler_url, poppler_zip):
+    # 下载Poppler（已缓存时直接使用缓存文件）
+    poppler_zip = download_cached(POPPLER_URL, POPPLER_SHA256)
+    if poppler_zip:
         # 解压
         if extract_zip(poppler_zip, "."):
             # 重命名目录
@@ -77,8 +196,6 @@ def download_poppler():
                 extracted_dir.rename(poppler_dir)
                 print(f"Poppler已安装到: {poppler_dir.absolute()}")
             
-            # 清理下载文件
-            os.remove(poppler_zip)
             return True
     
     return False
@@ -10,6 +10,7 @@ import os
 import sys
 import time
 import logging
+import multiprocessing
 from pathlib import Path
 from typing import Optional
 
@@ -25,7 +26,7 @@ if sys.platform == 'win32':
 from config import config
 from utils import (
     setup_logging, validate_file_path, ensure_directory, 
-    generate_output_filename, format_time, cleanup_directory,
+    generate_output_filename, format_time, cleanup_directory, iter_in_thread,
     OCRError, FileProcessError, ConfigError
 )
 from pdf_processor import PDFProcessor
@@ -88,58 +89,56 @@ class PDFOCRTool:
             # 解析页面范围
             page_range_tuple = self._parse_page_range(page_range, pdf_info['total_pages'])
             
-            # 转换PDF为图片
-            self.logger.info("正在转换PDF为图片...")
+            # 转换、优化、识别三个阶段通过有界队列并行进行，
+            # 内存中只保留少量页面
+            if page_range_tuple is None:
+                page_range_tuple = (1, pdf_info['total_pages'])
+            total_pages = page_range_tuple[1] - page_range_tuple[0] + 1
+            if total_pages < 1:
+                self.logger.error("没有需要处理的页面")
+                return False
+            
+            self.logger.info("正在转换PDF并进行OCR文字识别...")
             images = self.pdf_processor.convert_pdf_to_images(
                 pdf_path, dpi=dpi, page_range=page_range_tuple
             )
             
-            if not images:
-                self.logger.error("PDF转换失败")
-                return False
-            
             # 保存原始图片（如果需要）
             if save_images:
                 if not images_dir:
                     images_dir = os.path.join(config.output_directory, "images")
                 
                 self.logger.info(f"正在保存转换后的图片到: {images_dir}")
-                pdf_name = Path(pdf_path).stem
-                saved_image_paths = self.pdf_processor.save_images_to_directory(
-                    images, images_dir, prefix=f"{pdf_name}_page"
+                images = self._save_images_while_iterating(
+                    images, images_dir, prefix=f"{Path(pdf_path).stem}_page"
                 )
-                self.logger.info(f"已保存 {len(saved_image_paths)} 张图片")
             
-            # 优化图片
-            self.logger.info("正在优化图片...")
-            optimized_images = [
-                self.pdf_processor.optimize_image_for_ocr(img) for img in images
-            ]
+            rendered_images = iter_in_thread(images, maxsize=4)
+            optimized_images = iter_in_thread(
+                map(self.pdf_processor.optimize_image_for_ocr, rendered_images),
+                maxsize=config.max_workers * 2
+            )
             
-            # OCR识别
-            self.logger.info("开始OCR文字识别...")
+            # OCR识别（置信度阈值为0时不需要计算置信度）
             ocr_results = self.ocr_engine.batch_extract_text(
-                optimized_images, language=language
+                optimized_images, language=language, total=total_pages,
+                need_confidence=config.confidence_threshold > 0
             )
             
             if not ocr_results:
                 self.logger.error("OCR识别失败")
                 return False
             
-            # 格式化文本
-            self.logger.info("正在格式化文本...")
-            formatted_text = self.text_formatter.format_ocr_results(ocr_results)
-            
             # 生成输出路径
             if not output_path:
                 output_path = generate_output_filename(
                     pdf_path, config.output_directory, output_format or config.output_format
                 )
             
-            # 保存结果
-            self.logger.info(f"正在保存结果到: {output_path}")
+            # 逐页格式化并写出结果，不在内存中拼接完整文本
+            self.logger.info(f"正在格式化并保存结果到: {output_path}")
             success = self.text_formatter.save_text(
-                formatted_text, output_path, output_format
+                self.text_formatter.iter_formatted_pages(ocr_results), output_path, output_format
             )
             
             if not success:
@@ -171,6 +170,32 @@ class PDFOCRTool:
             self.logger.error(f"未知错误: {e}")
             return False
     
+    def _save_images_while_iterating(self, images, images_dir: str, prefix: str):
+        """逐张保存经过的图片，并原样交给下一阶段
+        
+        Args:
+            images: PIL图片对象（可迭代）
+            images_dir: 图片保存目录
+            prefix: 文件名前缀
+            
+        Yields:
+            PIL图片对象
+        """
+        ensure_directory(images_dir)
+        saved_count = 0
+        
+        for i, image in enumerate(images, 1):
+            try:
+                self.pdf_processor.save_image(
+                    image, os.path.join(images_dir, f"{prefix}_{i:04d}")
+                )
+                saved_count += 1
+            except Exception as e:
+                self.logger.error(f"保存图片失败: {e}")
+            yield image
+        
+        self.logger.info(f"已保存 {saved_count} 张图片")
+    
     def _parse_page_range(self, page_range: str, total_pages: int) -> Optional[tuple]:
         """解析页面范围
         
@@ -184,15 +209,24 @@ class PDFOCRTool:
         if not page_range:
             return None
         
+        head, sep, tail = page_range.partition('-')
         try:
-            if '-' in page_range:
-                start, end = map(int, page_range.split('-'))
+            if sep:
+                # 支持省略起止页，如 "-5"、"3-"；"1-2-3" 这样的格式无效
+                if '-' in tail:
+                    raise ValueError(page_range)
+                start = int(head) if head.strip() else 1
+                end = int(tail) if tail.strip() else total_pages
+                # 起始页超出文档页数或晚于结束页时视为无效范围
                 start = max(1, start)
                 end = min(total_pages, end)
+                if start > end:
+                    raise ValueError(page_range)
                 return (start, end)
             else:
-                page = int(page_range)
-                page = max(1, min(total_pages, page))
+                page = max(1, int(head))
+                if page > total_pages:
+                    raise ValueError(page_range)
                 return (page, page)
         except ValueError:
             self.logger.warning(f"无效的页面范围: {page_range}，将处理所有页面")
@@ -410,4 +444,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # 打包后的可执行文件使用多进程OCR时需要
+    multiprocessing.freeze_support()
     sys.exit(main())
\ No newline at end of file
@@ -5,18 +5,230 @@ OCR识别引擎模块
 负责图片文字识别和语言处理
 """
 
+import functools
+import io
 import logging
+import multiprocessing
 import re
 import shutil
 import os
 import sys
-from typing import List, Dict, Optional, Tuple
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple, Union
 from PIL import Image
 import pytesseract
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from utils import OCRError, print_progress_bar
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED, ALL_COMPLETED
+from utils import OCRError, ensure_directory, print_progress_bar
 from config import config
 
+# 限制每个Tesseract进程的OpenMP线程数，并行由多进程提供。
+# 须在导入tesserocr（加载libtesseract及其OpenMP运行时）之前设置
+os.environ.setdefault('OMP_THREAD_LIMIT', str(config.tesseract_threads))
+
+try:
+    import tesserocr
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
+
+
+# 非中文识别时使用的字符白名单
+_CHAR_WHITELIST = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+
+# Tesseract参数
+# 中文模式：移除字符白名单限制，使用更宽松的配置以支持更好的中文识别
+_CONFIG_CHI = r'--oem 3 --psm 6'
+# 其他语言：限制为字母和数字
+_CONFIG_ASCII = rf'--oem 3 --psm 6 -c tessedit_char_whitelist={_CHAR_WHITELIST}'
+
+# 连续空白字符
+_WHITESPACE_RE = re.compile(r'\s+')
+
+@functools.lru_cache(maxsize=1)
+def _tesseract_languages() -> Tuple[str, ...]:
+    """获取Tesseract可用语言（每个进程只调用一次 tesseract --list-langs）
+    
+    Returns:
+        可用语言代码
+    """
+    languages = tuple(pytesseract.get_languages())
+    logging.getLogger("pdf_ocr.ocr_engine").info(f"可用OCR语言: {list(languages)}")
+    return languages
+
+
+@functools.lru_cache(maxsize=16)
+def _is_language_available(language: str) -> bool:
+    """检查语言（含 chi_sim+eng 这样的组合语言）是否全部可用
+    
+    Args:
+        language: 语言代码
+        
+    Returns:
+        语言是否可用
+    """
+    available_langs = set(_tesseract_languages())
+    return all(lang in available_langs for lang in language.split('+'))
+
+
+# Windows上常见的Tesseract安装目录
+_WIN_TESSERACT_DIRS = (
+    r'C:\Program Files\Tesseract-OCR',
+    r'C:\Program Files (x86)\Tesseract-OCR',
+    r'C:\software\Tesseract-OCR',
+    r'C:\tools\Tesseract-OCR',
+)
+
+
+def _scan_tesseract_dir(directory: str) -> Tuple[bool, bool]:
+    """读取一次目录，检查是否包含 tesseract.exe 和 tessdata 目录
+    
+    Args:
+        directory: 待检查的目录
+        
+    Returns:
+        (是否包含tesseract.exe, 是否包含tessdata目录)
+    """
+    has_exe = has_tessdata = False
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                name = entry.name.lower()
+                if name == 'tesseract.exe' and entry.is_file():
+                    has_exe = True
+                elif name == 'tessdata' and entry.is_dir():
+                    has_tessdata = True
+    except OSError:
+        pass
+    return has_exe, has_tessdata
+
+
+# 工作进程内的OCR引擎实例，由_worker_init创建
+_worker_engine = None
+
+
+def _worker_init(tesseract_threads: int):
+    """OCR工作进程初始化
+    
+    Args:
+        tesseract_threads: 每个Tesseract进程使用的线程数
+    """
+    global _worker_engine
+    os.environ['OMP_THREAD_LIMIT'] = str(tesseract_threads)
+    _worker_engine = OCREngine()
+
+
+def _worker_extract_text(image_data: Union[str, bytes], language: str = None,
+                         need_confidence: bool = True) -> Dict[str, any]:
+    """在工作进程中识别单张图片
+    
+    Args:
+        image_data: 图片文件路径，或PNG编码的图片数据
+        language: OCR识别语言
+        need_confidence: 是否计算置信度
+        
+    Returns:
+        OCR结果字典
+    """
+    return _worker_engine.extract_text_from_image(image_data, language, need_confidence)
+
+
+def _encode_image(image: Image.Image) -> bytes:
+    """将图片编码为PNG数据，用于传递给工作进程
+    
+    编码后的数据远小于原始像素（二值化页面尤其明显），工作进程无需解码，
+    直接写入临时文件交给Tesseract。
+    
+    Args:
+        image: PIL图片对象
+        
+    Returns:
+        PNG编码的图片数据
+    """
+    buffer = io.BytesIO()
+    image.save(buffer, 'PNG', compress_level=1)
+    return buffer.getvalue()
+
+
+@dataclass
+class OCRBatchResult:
+    """批量OCR结果
+    
+    各字段按列存储（每个字段一个列表，下标对应页面顺序），统计时直接对列求和，
+    无需逐页访问字典。通过下标或迭代访问时返回与单页结果相同格式的字典。
+    """
+    text: List[str] = field(default_factory=list)
+    raw_text: List[str] = field(default_factory=list)
+    confidence: List[float] = field(default_factory=list)
+    language: List[str] = field(default_factory=list)
+    word_count: List[int] = field(default_factory=list)
+    char_count: List[int] = field(default_factory=list)
+    page_number: List[int] = field(default_factory=list)
+    errors: Dict[int, str] = field(default_factory=dict)  # 页面下标 -> 错误信息
+    
+    @classmethod
+    def from_results(cls, results: Iterable[Dict[str, any]]) -> 'OCRBatchResult':
+        """由单页结果字典构建批量结果
+        
+        Args:
+            results: OCR结果字典（可迭代）
+            
+        Returns:
+            批量OCR结果
+        """
+        batch = cls()
+        for result in results:
+            batch.append(result)
+        return batch
+    
+    def append(self, result: Dict[str, any]):
+        """追加一页结果
+        
+        Args:
+            result: 单页OCR结果字典
+        """
+        index = len(self.text)
+        self.text.append(result.get('text', ''))
+        self.raw_text.append(result.get('raw_text', ''))
+        self.confidence.append(result.get('confidence', 0))
+        self.language.append(result.get('language', ''))
+        self.word_count.append(result.get('word_count', 0))
+        self.char_count.append(result.get('char_count', 0))
+        self.page_number.append(result.get('page_number', index + 1))
+        if 'error' in result:
+            self.errors[index] = result['error']
+    
+    def __len__(self) -> int:
+        return len(self.text)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("OCR结果下标超出范围")
+        
+        result = {
+            'text': self.text[index],
+            'raw_text': self.raw_text[index],
+            'confidence': self.confidence[index],
+            'language': self.language[index],
+            'word_count': self.word_count[index],
+            'char_count': self.char_count[index],
+            'page_number': self.page_number[index]
+        }
+        if index in self.errors:
+            result['error'] = self.errors[index]
+        return result
+    
+    def __iter__(self) -> Iterator[Dict[str, any]]:
+        for i in range(len(self)):
+            yield self[i]
+
 
 class OCREngine:
     """OCR识别引擎类"""
@@ -30,6 +242,12 @@ class OCREngine:
         # 设置Tesseract路径（支持打包环境）
         self._setup_tesseract_path()
         self._check_tesseract()
+        
+        # 预先验证默认语言，填充语言缓存
+        self.validate_language(self.language)
+        
+        # 每个线程常驻一个tesserocr API实例（API实例不是线程安全的）
+        self._local = threading.local()
     
     def _setup_tesseract_path(self):
         """设置Tesseract路径，支持打包环境和Windows自动配置"""
@@ -78,52 +296,35 @@ class OCREngine:
     def _setup_windows_tessdata(self, tesseract_cmd):
         """为Windows设置TESSDATA_PREFIX环境变量"""
         try:
-            # 从tesseract.exe路径推断tessdata路径
+            # 从tesseract.exe路径推断tessdata路径，其次尝试上级目录和常见安装目录
             tesseract_dir = os.path.dirname(tesseract_cmd)
-            tessdata_path = os.path.join(tesseract_dir, 'tessdata')
+            candidates = (tesseract_dir, os.path.dirname(tesseract_dir)) + _WIN_TESSERACT_DIRS
             
-            if os.path.exists(tessdata_path):
-                os.environ['TESSDATA_PREFIX'] = tessdata_path
-                self.logger.info(f"自动设置TESSDATA_PREFIX: {tessdata_path}")
+            for directory in candidates:
+                _, has_tessdata = _scan_tesseract_dir(directory)
+                if has_tessdata:
+                    tessdata_path = os.path.abspath(os.path.join(directory, 'tessdata'))
+                    os.environ['TESSDATA_PREFIX'] = tessdata_path
+                    self.logger.info(f"自动设置TESSDATA_PREFIX: {tessdata_path}")
+                    break
             else:
-                # 尝试其他可能的tessdata位置
-                possible_paths = [
-                    os.path.join(os.path.dirname(tesseract_dir), 'tessdata'),
-                    os.path.join(tesseract_dir, '..', 'tessdata'),
-                    r'C:\Program Files\Tesseract-OCR\tessdata',
-                    r'C:\Program Files (x86)\Tesseract-OCR\tessdata'
-                ]
-                
-                for path in possible_paths:
-                    abs_path = os.path.abspath(path)
-                    if os.path.exists(abs_path):
-                        os.environ['TESSDATA_PREFIX'] = abs_path
-                        self.logger.info(f"找到tessdata目录: {abs_path}")
-                        break
-                else:
-                    self.logger.warning("无法找到tessdata目录，可能需要手动设置TESSDATA_PREFIX环境变量")
+                self.logger.warning("无法找到tessdata目录，可能需要手动设置TESSDATA_PREFIX环境变量")
                     
         except Exception as e:
             self.logger.warning(f"设置Windows tessdata路径失败: {e}")
     
     def _find_windows_tesseract(self):
         """在Windows上查找Tesseract安装"""
-        possible_paths = [
-            r'C:\Program Files\Tesseract-OCR\tesseract.exe',
-            r'C:\Program Files (x86)\Tesseract-OCR\tesseract.exe',
-            r'C:\software\Tesseract-OCR\tesseract.exe',
-            r'C:\tools\Tesseract-OCR\tesseract.exe'
-        ]
-        
-        for path in possible_paths:
-            if os.path.exists(path):
+        for directory in _WIN_TESSERACT_DIRS:
+            has_exe, has_tessdata = _scan_tesseract_dir(directory)
+            if has_exe:
+                path = os.path.join(directory, 'tesseract.exe')
                 pytesseract.pytesseract.tesseract_cmd = path
                 self.logger.info(f"找到Tesseract安装: {path}")
                 
                 # 设置对应的tessdata路径
-                tesseract_dir = os.path.dirname(path)
-                tessdata_path = os.path.join(tesseract_dir, 'tessdata')
-                if os.path.exists(tessdata_path):
+                if has_tessdata:
+                    tessdata_path = os.path.join(directory, 'tessdata')
                     os.environ['TESSDATA_PREFIX'] = tessdata_path
                     self.logger.info(f"设置tessdata路径: {tessdata_path}")
                 break
@@ -168,9 +369,7 @@ class OCREngine:
             可用语言列表
         """
         try:
-            languages = pytesseract.get_languages()
-            self.logger.info(f"可用OCR语言: {languages}")
-            return languages
+            return list(_tesseract_languages())
         except Exception as e:
             self.logger.error(f"获取语言列表失败: {e}")
             return []
@@ -184,26 +383,151 @@ class OCREngine:
         Returns:
             语言是否可用
         """
-        available_langs = self.get_available_languages()
-        
-        # 处理组合语言（如 chi_sim+eng）
-        if '+' in language:
-            langs = language.split('+')
-            return all(lang in available_langs for lang in langs)
-        
-        return language in available_langs
+        try:
+            return _is_language_available(language)
+        except Exception as e:
+            self.logger.error(f"获取语言列表失败: {e}")
+            return False
     
-    def extract_text_from_image(self, image: Image.Image, 
-                              language: str = None) -> Dict[str, any]:
+    def extract_text_from_image(self, image: Union[Image.Image, str, bytes], 
+                              language: str = None,
+                              need_confidence: bool = True) -> Dict[str, any]:
         """从图片中提取文字
         
         Args:
-            image: PIL图片对象
+            image: PIL图片对象、图片文件路径或PNG编码的图片数据
             language: OCR识别语言
+            need_confidence: 是否计算置信度，不需要时只获取文字，省去逐词数据的输出和解析
             
         Returns:
             包含文字内容和置信度的字典
         """
+        language = self._resolve_language(language)
+        
+        temp_path = None
+        try:
+            # 有tesserocr时直接使用常驻的API，省去每页启动进程和加载模型
+            if TESSEROCR_AVAILABLE:
+                return self._extract_with_tesserocr(image, language, need_confidence)
+            
+            custom_config = self._get_ocr_config(language)
+            
+            # 图片只保存一次（快速压缩），以路径传给Tesseract，避免pytesseract再次写临时文件
+            if not isinstance(image, str):
+                temp_path = self._save_temp_image(image)
+                image = temp_path
+            
+            if not need_confidence:
+                text = pytesseract.image_to_string(image, lang=language, config=custom_config)
+                return self._build_result(text, None, language)
+            
+            # 只运行一次OCR，文字和置信度都从详细结果中获取
+            data = pytesseract.image_to_data(
+                image, 
+                lang=language,
+                config=custom_config,
+                output_type=pytesseract.Output.DICT
+            )
+            
+            text = self._text_from_data(data, range(len(data['text'])))
+            return self._build_result(text, data['conf'], language)
+            
+        except Exception as e:
+            error_msg = f"OCR识别失败: {e}"
+            self.logger.error(error_msg)
+            raise OCRError(error_msg)
+        finally:
+            if temp_path:
+                try:
+                    os.unlink(temp_path)
+                except OSError:
+                    pass
+    
+    def _get_tesserocr_api(self, language: str):
+        """获取当前线程的tesserocr API，语言变化时重新初始化
+        
+        Args:
+            language: OCR识别语言
+            
+        Returns:
+            tesserocr.PyTessBaseAPI实例
+        """
+        api = getattr(self._local, 'api', None)
+        if api is not None and self._local.language == language:
+            return api
+        
+        if api is not None:
+            api.End()
+        
+        kwargs = {}
+        if os.environ.get('TESSDATA_PREFIX'):
+            kwargs['path'] = os.environ['TESSDATA_PREFIX']
+        
+        # 与命令行参数 --oem 3 --psm 6 保持一致
+        api = tesserocr.PyTessBaseAPI(
+            lang=language, psm=tesserocr.PSM.SINGLE_BLOCK, oem=tesserocr.OEM.DEFAULT, **kwargs
+        )
+        if 'chi' not in language:
+            api.SetVariable('tessedit_char_whitelist', _CHAR_WHITELIST)
+        
+        self._local.api = api
+        self._local.language = language
+        return api
+    
+    def _extract_with_tesserocr(self, image: Union[Image.Image, str, bytes], 
+                                language: str, need_confidence: bool) -> Dict[str, any]:
+        """使用tesserocr识别图片
+        
+        Args:
+            image: PIL图片对象、图片文件路径或PNG编码的图片数据
+            language: OCR识别语言
+            need_confidence: 是否计算置信度
+            
+        Returns:
+            OCR结果字典
+        """
+        api = self._get_tesserocr_api(language)
+        
+        if isinstance(image, str):
+            api.SetImageFile(image)
+        else:
+            if isinstance(image, bytes):
+                image = Image.open(io.BytesIO(image))
+            api.SetImage(image)
+        
+        text = api.GetUTF8Text()
+        confs = api.AllWordConfidences() if need_confidence else None
+        return self._build_result(text, confs, language)
+    
+    def _save_temp_image(self, image: Union[Image.Image, bytes]) -> str:
+        """将图片保存为临时PNG文件
+        
+        临时文件用完即删，使用最低压缩级别以加快保存速度。
+        
+        Args:
+            image: PIL图片对象或PNG编码的图片数据
+            
+        Returns:
+            临时文件路径
+        """
+        ensure_directory(config.temp_directory)
+        with tempfile.NamedTemporaryFile(suffix='.png', dir=config.temp_directory, 
+                                         delete=False) as f:
+            if isinstance(image, bytes):
+                f.write(image)
+            else:
+                image.save(f, 'PNG', compress_level=1)
+            return f.name
+    
+    def _resolve_language(self, language: str = None) -> str:
+        """确定实际使用的OCR语言，不可用时回退到可用的语言
+        
+        Args:
+            language: OCR识别语言
+            
+        Returns:
+            可用的语言代码
+        """
         if language is None:
             language = self.language
         
@@ -221,58 +545,90 @@ class OCREngine:
             else:
                 language = 'eng'  # 回退到英语
         
-        try:
-            # 配置OCR参数 - 移除字符白名单限制以支持更好的中文识别
-            if 'chi' in language.lower():
-                # 中文模式：使用更宽松的配置
-                custom_config = r'--oem 3 --psm 6'
-            else:
-                # 其他语言：保持原有配置
-                custom_config = r'--oem 3 --psm 6 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
-            
-            # 提取文字
-            text = pytesseract.image_to_string(
-                image, 
-                lang=language,
-                config=custom_config
-            )
-            
-            # 获取详细信息（包含置信度）
-            data = pytesseract.image_to_data(
-                image, 
-                lang=language,
-                config=custom_config,
-                output_type=pytesseract.Output.DICT
-            )
-            
-            # 计算平均置信度
-            confidences = [int(conf) for conf in data['conf'] if int(conf) > -1]  # 包含0置信度
-            avg_confidence = sum(confidences) / len(confidences) if confidences else 0
-            
-            # 如果置信度过低，记录调试信息
-            if avg_confidence < 50:
-                self.logger.warning(f"OCR置信度较低: {avg_confidence:.1f}%, 语言: {language}")
-                self.logger.debug(f"原始文本: {text[:100]}...")
+        return language
+    
+    def _get_ocr_config(self, language: str) -> str:
+        """获取OCR参数
+        
+        Args:
+            language: OCR识别语言
             
-            # 清理文本
-            cleaned_text = self._clean_text(text)
+        Returns:
+            Tesseract参数字符串
+        """
+        # 语言代码均为小写
+        return _CONFIG_CHI if 'chi' in language else _CONFIG_ASCII
+    
+    def _text_from_data(self, data: Dict[str, List], indices) -> str:
+        """根据Tesseract详细结果重建文本
+        
+        同一行的单词以空格分隔，换行处插入换行符，段落之间空一行。
+        
+        Args:
+            data: image_to_data返回的字典
+            indices: 需要重建的条目下标
             
-            result = {
-                'text': cleaned_text,
-                'raw_text': text,
-                'confidence': round(avg_confidence, 2),
-                'language': language,
-                'word_count': len(cleaned_text.split()),
-                'char_count': len(cleaned_text)
-            }
+        Returns:
+            重建的文本
+        """
+        parts = []
+        previous_line = None
+        
+        for i in indices:
+            word = data['text'][i]
+            if not word or not word.strip():
+                continue
             
-            self.logger.debug(f"OCR结果: 置信度={avg_confidence:.1f}%, 字符数={len(cleaned_text)}")
-            return result
+            line = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+            if previous_line is not None:
+                if line[:2] != previous_line[:2]:
+                    parts.append('\n\n')
+                elif line != previous_line:
+                    parts.append('\n')
+                else:
+                    parts.append(' ')
+            parts.append(word)
+            previous_line = line
+        
+        return ''.join(parts)
+    
+    def _build_result(self, text: str, confs: Optional[List], language: str) -> Dict[str, any]:
+        """根据识别文本和单词置信度构建OCR结果
+        
+        Args:
+            text: 原始识别文本
+            confs: 单词置信度列表（-1表示非文字项），为None时表示未计算置信度
+            language: OCR识别语言
             
-        except Exception as e:
-            error_msg = f"OCR识别失败: {e}"
-            self.logger.error(error_msg)
-            raise OCRError(error_msg)
+        Returns:
+            OCR结果字典
+        """
+        # 计算平均置信度（未计算时记为100）
+        if confs is None:
+            avg_confidence = 100.0
+        else:
+            confidences = [conf for conf in map(int, confs) if conf > -1]  # 包含0置信度
+            avg_confidence = sum(confidences) / len(confidences) if confidences else 0
+        
+        # 如果置信度过低，记录调试信息
+        if avg_confidence < 50:
+            self.logger.warning(f"OCR置信度较低: {avg_confidence:.1f}%, 语言: {language}")
+            self.logger.debug(f"原始文本: {text[:100]}...")
+        
+        # 清理文本
+        cleaned_text = self._clean_text(text)
+        
+        result = {
+            'text': cleaned_text,
+            'raw_text': text,
+            'confidence': round(avg_confidence, 2),
+            'language': language,
+            'word_count': len(cleaned_text.split()),
+            'char_count': len(cleaned_text)
+        }
+        
+        self.logger.debug(f"OCR结果: 置信度={avg_confidence:.1f}%, 字符数={len(cleaned_text)}")
+        return result
     
     def _clean_text(self, text: str) -> str:
         """清理OCR识别的文本
@@ -287,62 +643,236 @@ class OCREngine:
             return ""
         
         # 移除多余的空白字符
-        text = re.sub(r'\s+', ' ', text)
+        text = _WHITESPACE_RE.sub(' ', text)
         
         # 移除行首行尾空白
         text = text.strip()
         
-        # 处理常见的OCR错误
-        # 这里可以添加更多的文本清理规则
-        replacements = {
-            '|': 'l',  # 竖线误识别为l
-            '0': 'O',  # 在某些上下文中
-            # 可以根据需要添加更多替换规则
-        }
-        
-        # 应用替换（谨慎使用，可能影响正确文本）
-        # for old, new in replacements.items():
-        #     text = text.replace(old, new)
+        # 常见OCR误识别的替换（如竖线误识别为l）可能影响正确文本，暂不启用；
+        # 启用时在模块级用 str.maketrans 预先构建替换表，以 text.translate 一次完成
         
         return text
     
-    def batch_extract_text(self, images: List[Image.Image], 
-                         language: str = None, 
-                         show_progress: bool = True) -> List[Dict[str, any]]:
-        """批量提取文字
+    def _save_batch_images(self, images: Iterable[Image.Image], work_dir: str) -> List[str]:
+        """将图片逐张保存到工作目录
         
         Args:
-            images: PIL图片对象列表
+            images: PIL图片对象（可迭代，逐张消费）
+            work_dir: 工作目录
+            
+        Returns:
+            保存的图片文件路径列表
+        """
+        image_paths = []
+        for i, image in enumerate(images):
+            image_path = os.path.join(work_dir, f"page_{i:04d}.png")
+            image.save(image_path, 'PNG', compress_level=1)
+            image_paths.append(image_path)
+        return image_paths
+    
+    def _batch_via_filelist(self, image_paths: List[str], language: str, 
+                            work_dir: str, need_confidence: bool = True) -> List[Dict[str, any]]:
+        """通过图片列表文件一次调用Tesseract识别全部图片
+        
+        Tesseract只启动一次并只加载一次语言模型，逐页输出结果。
+        
+        Args:
+            image_paths: 图片文件路径列表
             language: OCR识别语言
-            show_progress: 是否显示进度
+            work_dir: 存放列表文件和输出结果的工作目录
+            need_confidence: 是否计算置信度
             
         Returns:
             OCR结果列表
         """
-        if not images:
-            return []
+        custom_config = self._get_ocr_config(language)
+        
+        list_path = os.path.join(work_dir, 'pages.txt')
+        with open(list_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(image_paths) + '\n')
+        
+        output_base = os.path.join(work_dir, 'out')
+        
+        if not need_confidence:
+            # 只输出纯文本，各页之间以换页符分隔
+            pytesseract.pytesseract.run_tesseract(
+                list_path, output_base, extension='txt', lang=language, config=custom_config
+            )
+            with open(f"{output_base}.txt", 'r', encoding='utf-8') as f:
+                pages = f.read().split('\f')
+            
+            results = []
+            for i in range(len(image_paths)):
+                text = pages[i] if i < len(pages) else ''
+                result = self._build_result(text, None, language)
+                result['page_number'] = i + 1
+                results.append(result)
+            return results
+        
+        # 输出TSV，文字和置信度都从中获取
+        pytesseract.pytesseract.run_tesseract(
+            list_path, output_base, extension='tsv', lang=language,
+            config=f"{custom_config} -c tessedit_create_tsv=1"
+        )
+        
+        with open(f"{output_base}.tsv", 'r', encoding='utf-8') as f:
+            data = pytesseract.pytesseract.file_to_dict(f.read(), '\t', -1)
+        
+        # 按页分组条目（page_num从1开始）
+        page_indices = [[] for _ in image_paths]
+        for i, page_num in enumerate(data.get('page_num', [])):
+            if 1 <= page_num <= len(image_paths):
+                page_indices[page_num - 1].append(i)
         
         results = []
-        total_images = len(images)
+        for i, indices in enumerate(page_indices):
+            text = self._text_from_data(data, indices)
+            confs = [data['conf'][j] for j in indices]
+            result = self._build_result(text, confs, language)
+            result['page_number'] = i + 1
+            results.append(result)
         
-        self.logger.info(f"开始批量OCR识别，共 {total_images} 张图片")
+        return results
+    
+    def _batch_via_shards(self, images: Iterable[Image.Image], language: str, 
+                          total_images: int, work_dir: str, show_progress: bool,
+                          need_confidence: bool = True) -> List[Dict[str, any]]:
+        """将页面按顺序分成若干组，每组一次调用Tesseract识别，各组并行
         
-        # 使用线程池并行处理
-        max_workers = min(config.max_workers, total_images)
+        每组只启动一次Tesseract并只加载一次语言模型；各Tesseract进程为单线程，
+        并行由同时运行的多个进程提供。页面边保存边分组，凑满一组即开始识别。
         
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # 提交任务
-            future_to_index = {
-                executor.submit(self.extract_text_from_image, img, language): i 
-                for i, img in enumerate(images)
-            }
+        Args:
+            images: PIL图片对象（可迭代，逐张消费）
+            language: OCR识别语言
+            total_images: 图片总数
+            work_dir: 存放图片、列表文件和输出结果的工作目录
+            show_progress: 是否显示进度
+            need_confidence: 是否计算置信度
             
-            # 收集结果
-            completed = 0
-            results = [None] * total_images  # 预分配结果列表
+        Returns:
+            OCR结果列表
+        """
+        num_shards = min(config.max_workers, total_images)
+        shard_size = -(-total_images // num_shards)  # 向上取整
+        
+        completed = 0
+        progress_lock = threading.Lock()
+        
+        def run_shard(start: int, image_paths: List[str]) -> List[Dict[str, any]]:
+            shard_dir = os.path.join(work_dir, f"shard_{start:04d}")
+            ensure_directory(shard_dir)
+            try:
+                shard_results = self._batch_via_filelist(
+                    image_paths, language, shard_dir, need_confidence
+                )
+            except Exception as e:
+                # 只有本组改为逐页识别，无法识别的页面单独记录错误
+                self.logger.warning(
+                    f"第 {start + 1}-{start + len(image_paths)} 页批量OCR失败，改为逐页识别: {e}"
+                )
+                shard_results = []
+                for i, image_path in enumerate(image_paths):
+                    try:
+                        shard_results.append(
+                            self.extract_text_from_image(image_path, language, need_confidence)
+                        )
+                    except Exception as page_error:
+                        self.logger.error(f"页面 {start + i + 1} OCR失败: {page_error}")
+                        shard_results.append(self._error_result(language, start + i + 1, page_error))
+            
+            for i, result in enumerate(shard_results):
+                result['page_number'] = start + i + 1
+            return shard_results
+        
+        def report_progress(future):
+            nonlocal completed
+            if not show_progress:
+                return
+            with progress_lock:
+                completed += shard_lengths[future]
+                print_progress_bar(min(completed, total_images), total_images, "OCR识别")
+        
+        futures = []
+        shard_lengths = {}
+        with ThreadPoolExecutor(max_workers=num_shards) as executor:
+            def submit(start: int, image_paths: List[str]):
+                future = executor.submit(run_shard, start, image_paths)
+                shard_lengths[future] = len(image_paths)
+                futures.append(future)
+                future.add_done_callback(report_progress)
             
-            for future in as_completed(future_to_index):
-                index = future_to_index[future]
+            shard = []
+            shard_start = 0
+            for i, image in enumerate(images):
+                image_path = os.path.join(work_dir, f"page_{i:04d}.png")
+                image.save(image_path, 'PNG', compress_level=1)
+                shard.append(image_path)
+                
+                if len(shard) >= shard_size:
+                    submit(shard_start, shard)
+                    shard = []
+                    shard_start = i + 1
+            
+            if shard:
+                submit(shard_start, shard)
+        
+        # 各组按起始页顺序提交，依次拼接即为页面顺序
+        results = []
+        for future in futures:
+            results.extend(future.result())
+        return results
+    
+    def _error_result(self, language: str, page_number: int, error: Exception) -> Dict[str, any]:
+        """构建识别失败页面的结果
+        
+        Args:
+            language: OCR识别语言
+            page_number: 页码
+            error: 失败原因
+            
+        Returns:
+            OCR结果字典
+        """
+        return {
+            'text': '',
+            'raw_text': '',
+            'confidence': 0,
+            'language': language,
+            'word_count': 0,
+            'char_count': 0,
+            'page_number': page_number,
+            'error': str(error)
+        }
+    
+    def _batch_via_pool(self, images: Iterable[Union[Image.Image, str]], language: str, 
+                        total_images: int, show_progress: bool,
+                        need_confidence: bool = True) -> List[Dict[str, any]]:
+        """使用进程池逐页识别，每个进程运行单线程的Tesseract
+        
+        Args:
+            images: PIL图片对象或图片文件路径（可迭代）
+            language: OCR识别语言
+            total_images: 图片总数
+            show_progress: 是否显示进度
+            need_confidence: 是否计算置信度
+            
+        Returns:
+            OCR结果列表
+        """
+        max_workers = min(config.max_workers, total_images)
+        # 限制同时提交的页面数，避免一次性读入全部图片
+        max_pending = max_workers * 2
+        
+        results = {}
+        completed = 0
+        last_update = 0.0
+        
+        def collect(pending, return_when):
+            nonlocal completed, last_update
+            done, _ = wait(pending, return_when=return_when)
+            for future in done:
+                index = pending.pop(future)
                 completed += 1
                 
                 try:
@@ -350,27 +880,105 @@ class OCREngine:
                     result['page_number'] = index + 1
                     results[index] = result
                     
-                    if show_progress:
+                    # 限制进度条刷新频率（约20次/秒），减少终端输出开销
+                    now = time.monotonic()
+                    if show_progress and (completed == total_images or now - last_update > 0.05):
                         print_progress_bar(completed, total_images, "OCR识别")
+                        last_update = now
                         
                 except Exception as e:
                     self.logger.error(f"页面 {index + 1} OCR失败: {e}")
-                    results[index] = {
-                        'text': '',
-                        'raw_text': '',
-                        'confidence': 0,
-                        'language': language or self.language,
-                        'word_count': 0,
-                        'char_count': 0,
-                        'page_number': index + 1,
-                        'error': str(e)
-                    }
+                    results[index] = self._error_result(language, index + 1, e)
         
-        # 过滤掉None值（如果有的话）
-        results = [r for r in results if r is not None]
+        # 渲染和预处理线程此时已在运行，用spawn启动工作进程，
+        # 避免fork时复制其他线程持有的锁导致子进程死锁
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_worker_init,
+                                 initargs=(config.tesseract_threads,),
+                                 mp_context=multiprocessing.get_context('spawn')) as executor:
+            pending = {}
+            for i, img in enumerate(images):
+                if len(pending) >= max_pending:
+                    collect(pending, FIRST_COMPLETED)
+                
+                # 图片以文件路径或PNG编码数据传递给工作进程
+                future = executor.submit(
+                    _worker_extract_text,
+                    img if isinstance(img, str) else _encode_image(img),
+                    language,
+                    need_confidence
+                )
+                pending[future] = i
+            
+            if pending:
+                collect(pending, ALL_COMPLETED)
+        
+        # 按页面顺序返回结果
+        return [results[i] for i in sorted(results)]
+    
+    def batch_extract_text(self, images: Iterable[Image.Image], 
+                         language: str = None, 
+                         show_progress: bool = True,
+                         total: Optional[int] = None,
+                         need_confidence: bool = True) -> OCRBatchResult:
+        """批量提取文字
+        
+        Args:
+            images: PIL图片对象列表或可迭代对象（如生成器，逐张消费）
+            language: OCR识别语言
+            show_progress: 是否显示进度
+            total: 图片总数，images没有长度时需要提供
+            need_confidence: 是否计算置信度
+            
+        Returns:
+            批量OCR结果（按页面顺序）
+        """
+        if total is None:
+            if not hasattr(images, '__len__'):
+                images = list(images)
+            total = len(images)
+        
+        if not total:
+            return OCRBatchResult()
+        
+        total_images = total
+        
+        self.logger.info(f"开始批量OCR识别，共 {total_images} 张图片")
+        
+        # 在分发任务前确定识别语言，各页面无需重复验证
+        language = self._resolve_language(language)
+        
+        # 使用tesserocr时每个工作进程的模型只加载一次，直接逐页识别
+        if TESSEROCR_AVAILABLE:
+            results = self._batch_via_pool(
+                images, language, total_images, show_progress, need_confidence
+            )
+        elif config.max_workers == 1:
+            # 单线程时一次启动Tesseract处理所有页面，避免逐页重复加载模型
+            ensure_directory(config.temp_directory)
+            with tempfile.TemporaryDirectory(dir=config.temp_directory) as work_dir:
+                image_paths = self._save_batch_images(images, work_dir)
+                try:
+                    results = self._batch_via_filelist(
+                        image_paths, language, work_dir, need_confidence
+                    )
+                    if show_progress:
+                        print_progress_bar(total_images, total_images, "OCR识别")
+                except Exception as e:
+                    # 图片已保存，逐页识别直接使用这些文件
+                    self.logger.warning(f"批量OCR失败，改为逐页识别: {e}")
+                    results = self._batch_via_pool(
+                        image_paths, language, total_images, show_progress, need_confidence
+                    )
+        else:
+            # 多线程时按工作进程数分组，每组一次启动Tesseract，各组并行识别
+            ensure_directory(config.temp_directory)
+            with tempfile.TemporaryDirectory(dir=config.temp_directory) as work_dir:
+                results = self._batch_via_shards(
+                    images, language, total_images, work_dir, show_progress, need_confidence
+                )
         
         self.logger.info(f"批量OCR完成，成功处理 {len(results)} 页")
-        return results
+        return OCRBatchResult.from_results(results)
     
     def extract_text_with_layout(self, image: Image.Image, 
                                language: str = None) -> Dict[str, any]:
@@ -394,16 +1002,14 @@ class OCREngine:
                 output_type=pytesseract.Output.DICT
             )
             
-            # 组织文本块
-            text_blocks = []
-            current_block = []
-            current_line = data['line_num'][0] if data['line_num'] else 0
-            
-            for i in range(len(data['text'])):
-                if int(data['conf'][i]) > self.confidence_threshold:
+            # 按 (块, 段落, 行) 分组，同一行的单词归入同一文本块
+            lines = {}
+            for i, conf in enumerate(data['conf']):
+                conf = int(conf)
+                if conf > self.confidence_threshold:
                     word_info = {
                         'text': data['text'][i],
-                        'confidence': int(data['conf'][i]),
+                        'confidence': conf,
                         'left': data['left'][i],
                         'top': data['top'][i],
                         'width': data['width'][i],
@@ -412,16 +1018,10 @@ class OCREngine:
                         'block_num': data['block_num'][i]
                     }
                     
-                    if data['line_num'][i] != current_line:
-                        if current_block:
-                            text_blocks.append(current_block)
-                        current_block = [word_info]
-                        current_line = data['line_num'][i]
-                    else:
-                        current_block.append(word_info)
+                    key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+                    lines.setdefault(key, []).append(word_info)
             
-            if current_block:
-                text_blocks.append(current_block)
+            text_blocks = list(lines.values())
             
             # 重建文本
             formatted_text = self._rebuild_text_from_blocks(text_blocks)
@@ -453,21 +1053,18 @@ class OCREngine:
             if not block:
                 continue
             
-            # 按水平位置排序单词
-            block.sort(key=lambda x: x['left'])
-            
-            # 组合单词为行
+            # Tesseract按阅读顺序输出同一行的单词，无需再按水平位置排序
             line_text = ' '.join(word['text'] for word in block if word['text'].strip())
             if line_text.strip():
                 lines.append(line_text)
         
         return '\n'.join(lines)
     
-    def get_ocr_statistics(self, results: List[Dict[str, any]]) -> Dict[str, any]:
+    def get_ocr_statistics(self, results: Union[OCRBatchResult, List[Dict[str, any]]]) -> Dict[str, any]:
         """获取OCR统计信息
         
         Args:
-            results: OCR结果列表
+            results: 批量OCR结果或OCR结果列表
             
         Returns:
             统计信息字典
@@ -475,24 +1072,24 @@ class OCREngine:
         if not results:
             return {}
         
+        if not isinstance(results, OCRBatchResult):
+            results = OCRBatchResult.from_results(results)
+        
+        # 按列统计
         total_pages = len(results)
-        total_chars = sum(r.get('char_count', 0) for r in results)
-        total_words = sum(r.get('word_count', 0) for r in results)
-        avg_confidence = sum(r.get('confidence', 0) for r in results) / total_pages
+        total_chars = sum(results.char_count)
+        total_words = sum(results.word_count)
+        avg_confidence = sum(results.confidence) / total_pages
         
         # 统计低置信度页面
         low_confidence_pages = [
-            r.get('page_number', i+1) 
-            for i, r in enumerate(results) 
-            if r.get('confidence', 0) < self.confidence_threshold
+            page_number 
+            for page_number, confidence in zip(results.page_number, results.confidence) 
+            if confidence < self.confidence_threshold
         ]
         
         # 统计错误页面
-        error_pages = [
-            r.get('page_number', i+1) 
-            for i, r in enumerate(results) 
-            if 'error' in r
-        ]
+        error_pages = [results.page_number[i] for i in sorted(results.errors)]
         
         return {
             'total_pages': total_pages,
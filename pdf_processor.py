@@ -6,16 +6,42 @@ PDF处理模块
 """
 
 import os
+import functools
 import logging
 import subprocess
 import shutil
-from typing import List, Optional, Tuple
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Tuple
 from PIL import Image
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
 from utils import validate_file_path, ensure_directory, FileProcessError
 from config import config
 
 
+# 图片格式 -> (扩展名, PIL格式, 保存参数)
+_IMAGE_FORMATS = {
+    'png': ('.png', 'PNG', {'optimize': True}),
+    'png_fast': ('.png', 'PNG', {'compress_level': 1}),
+    'jpeg': ('.jpg', 'JPEG', {'quality': 90}),
+    'jpg': ('.jpg', 'JPEG', {'quality': 90}),
+    'webp': ('.webp', 'WEBP', {'quality': 90}),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _which(tool: str) -> Optional[str]:
+    """查找系统工具路径（每个进程对每个工具只搜索一次PATH）
+    
+    Args:
+        tool: 工具名称
+        
+    Returns:
+        工具的完整路径，未找到时返回None
+    """
+    return shutil.which(tool)
+
+
 class PDFProcessor:
     """PDF处理器类"""
     
@@ -35,7 +61,7 @@ class PDFProcessor:
         # 检查 poppler 工具
         poppler_tools = ['pdfinfo', 'pdftoppm']
         for tool in poppler_tools:
-            if not shutil.which(tool):
+            if not _which(tool):
                 missing_deps.append(f"poppler ({tool})")
         
         if missing_deps:
@@ -49,37 +75,47 @@ class PDFProcessor:
             self.logger.error(error_msg)
             raise FileProcessError(error_msg)
     
-    def validate_pdf(self, pdf_path: str) -> bool:
-        """验证PDF文件
+    def _read_pdf_info(self, pdf_path: str) -> Optional[dict]:
+        """读取PDF元信息（调用pdfinfo，不渲染页面）
         
         Args:
             pdf_path: PDF文件路径
             
         Returns:
-            PDF文件是否有效
+            pdfinfo输出的信息字典，文件无效时返回None
         """
         if not validate_file_path(pdf_path, ['.pdf']):
             self.logger.error(f"无效的PDF文件: {pdf_path}")
-            return False
+            return None
         
         try:
-            # 尝试读取PDF的第一页来验证文件完整性
-            convert_from_path(pdf_path, first_page=1, last_page=1)
-            return True
+            return pdfinfo_from_path(pdf_path)
         except Exception as e:
             error_str = str(e)
-            if "poppler" in error_str.lower() or "unable to get page count" in error_str.lower():
+            # pdfinfo的错误都带有 "Unable to get page count"，先判断是否为加密文件
+            if "encrypted" in error_str.lower() or "password" in error_str.lower():
+                self.logger.error(f"PDF文件已加密，需要密码: {pdf_path}")
+            elif "poppler" in error_str.lower() or "unable to get page count" in error_str.lower():
                 self.logger.error(
                     f"PDF处理失败，poppler依赖缺失: {pdf_path}\n"
                     "请安装 poppler-utils:\n"
                     "  macOS: brew install poppler 或 conda install -c conda-forge poppler\n"
                     "  Ubuntu: sudo apt-get install poppler-utils"
                 )
-            elif "encrypted" in error_str.lower() or "password" in error_str.lower():
-                self.logger.error(f"PDF文件已加密，需要密码: {pdf_path}")
             else:
                 self.logger.error(f"PDF文件损坏或无法读取: {pdf_path}, 错误: {e}")
-            return False
+            return None
+    
+    def validate_pdf(self, pdf_path: str) -> bool:
+        """验证PDF文件
+        
+        Args:
+            pdf_path: PDF文件路径
+            
+        Returns:
+            PDF文件是否有效
+        """
+        return self._read_pdf_info(pdf_path) is not None
     
     def get_pdf_info(self, pdf_path: str) -> Optional[dict]:
         """获取PDF文件信息
@@ -90,18 +126,13 @@ class PDFProcessor:
         Returns:
             PDF文件信息字典，包含页数、文件大小等
         """
-        if not self.validate_pdf(pdf_path):
+        info = self._read_pdf_info(pdf_path)
+        if not info:
             return None
         
         try:
-            # 获取总页数
-            images = convert_from_path(pdf_path, first_page=1, last_page=1)
-            if not images:
-                return None
-            
-            # 通过尝试转换所有页面来获取总页数
-            all_images = convert_from_path(pdf_path)
-            total_pages = len(all_images)
+            # 页数直接从pdfinfo读取，无需渲染页面
+            total_pages = int(info['Pages'])
             
             # 获取文件大小
             file_size = os.path.getsize(pdf_path)
@@ -116,57 +147,93 @@ class PDFProcessor:
             self.logger.error(f"获取PDF信息失败: {pdf_path}, 错误: {e}")
             return None
     
+    def _render_pages(self, pdf_path: str, dpi: int, first_page: int, last_page: int,
+                      output_folder: str) -> List[str]:
+        """将一段页面渲染为图片文件
+        
+        Args:
+            pdf_path: PDF文件路径
+            dpi: 图片分辨率
+            first_page: 起始页（从1开始）
+            last_page: 结束页
+            output_folder: 图片输出目录
+            
+        Returns:
+            按页码排序的图片文件路径列表
+            
+        Raises:
+            FileProcessError: 文件处理错误
+        """
+        try:
+            # 输出到目录并只返回路径，页面不会全部以图片对象驻留内存；
+            # pdftoppm按 max_workers 分线程渲染（未配置时为CPU核数减一）
+            thread_count = config.max_workers or max(1, (os.cpu_count() or 2) - 1)
+            return convert_from_path(
+                pdf_path, dpi=dpi, fmt='RGB', thread_count=thread_count,
+                first_page=first_page, last_page=last_page,
+                output_folder=output_folder, paths_only=True
+            )
+        except Exception as e:
+            error_msg = f"PDF转换失败: {pdf_path}, 页面 {first_page}-{last_page}, 错误: {e}"
+            self.logger.error(error_msg)
+            raise FileProcessError(error_msg)
+    
     def convert_pdf_to_images(self, pdf_path: str, dpi: int = None, 
-                            page_range: Optional[Tuple[int, int]] = None) -> List[Image.Image]:
-        """将PDF转换为图片列表
+                            page_range: Optional[Tuple[int, int]] = None,
+                            chunk_size: int = None) -> Iterator[Image.Image]:
+        """将PDF逐页转换为图片
+        
+        每次渲染 chunk_size 页到临时目录，逐张读入后立即删除文件，
+        内存中不会同时保留全部页面。
         
         Args:
             pdf_path: PDF文件路径
             dpi: 图片分辨率，默认使用配置中的值
             page_range: 页面范围 (start_page, end_page)，从1开始
+            chunk_size: 每段渲染的页数，默认为 max_workers
             
-        Returns:
-            PIL图片对象列表
+        Yields:
+            PIL图片对象
             
         Raises:
             FileProcessError: 文件处理错误
         """
-        if not self.validate_pdf(pdf_path):
+        info = self._read_pdf_info(pdf_path)
+        if not info:
             raise FileProcessError(f"无效的PDF文件: {pdf_path}")
         
         if dpi is None:
             dpi = config.ocr_dpi
         
-        try:
-            self.logger.info(f"开始转换PDF: {pdf_path}, DPI: {dpi}")
-            
-            # 设置转换参数
-            convert_kwargs = {
-                'dpi': dpi,
-                'fmt': 'RGB',
-                'thread_count': config.max_workers
-            }
-            
-            # 如果指定了页面范围
-            if page_range:
-                start_page, end_page = page_range
-                convert_kwargs['first_page'] = start_page
-                convert_kwargs['last_page'] = end_page
-                self.logger.info(f"转换页面范围: {start_page}-{end_page}")
-            
-            # 转换PDF为图片
-            images = convert_from_path(pdf_path, **convert_kwargs)
-            
-            if not images:
-                raise FileProcessError("PDF转换结果为空")
-            
-            self.logger.info(f"PDF转换完成，共 {len(images)} 页")
-            return images
-            
-        except Exception as e:
-            error_msg = f"PDF转换失败: {pdf_path}, 错误: {e}"
-            self.logger.error(error_msg)
-            raise FileProcessError(error_msg)
+        if page_range is None:
+            page_range = (1, int(info['Pages']))
+        
+        chunk_size = chunk_size or max(1, config.max_workers)
+        start_page, end_page = page_range
+        self.logger.info(f"开始转换PDF: {pdf_path}, DPI: {dpi}")
+        self.logger.info(f"转换页面范围: {start_page}-{end_page}")
+        
+        converted = 0
+        ensure_directory(self.temp_dir)
+        with tempfile.TemporaryDirectory(dir=self.temp_dir) as output_folder:
+            for first_page in range(start_page, end_page + 1, chunk_size):
+                last_page = min(first_page + chunk_size - 1, end_page)
+                image_paths = self._render_pages(
+                    pdf_path, dpi, first_page, last_page, output_folder
+                )
+                self.logger.debug(f"已转换页面: {first_page}-{last_page}")
+                
+                for image_path in image_paths:
+                    image = Image.open(image_path)
+                    image.load()  # 读入像素数据并关闭文件
+                    os.unlink(image_path)
+                    converted += 1
+                    yield image
+        
+        if not converted:
+            raise FileProcessError("PDF转换结果为空")
+        
+        self.logger.info(f"PDF转换完成，共 {converted} 页")
     
     def convert_single_page(self, pdf_path: str, page_number: int, 
                           dpi: int = None) -> Optional[Image.Image]:
@@ -180,41 +247,79 @@ class PDFProcessor:
         Returns:
             PIL图片对象，失败时返回None
         """
+        images = self.convert_pdf_to_images(pdf_path, dpi, (page_number, page_number))
         try:
-            images = self.convert_pdf_to_images(
-                pdf_path, dpi, (page_number, page_number)
-            )
-            return images[0] if images else None
+            return next(images, None)
         except FileProcessError:
             return None
+        finally:
+            images.close()
     
-    def save_images_to_temp(self, images: List[Image.Image], 
-                          prefix: str = "page") -> List[str]:
-        """将图片保存到临时目录
+    def save_image(self, image: Image.Image, file_stem: str, 
+                   image_format: str = None) -> str:
+        """按指定格式保存图片
+        
+        Args:
+            image: PIL图片对象
+            file_stem: 不含扩展名的文件路径
+            image_format: 图片格式 (png/png_fast/jpeg/webp)，默认使用配置中的值
+            
+        Returns:
+            保存的图片文件路径
+        """
+        image_format = (image_format or config.image_format).lower()
+        extension, pil_format, save_kwargs = _IMAGE_FORMATS.get(image_format, _IMAGE_FORMATS['png'])
+        
+        # JPEG不支持1位图和透明通道
+        if pil_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        
+        file_path = file_stem + extension
+        image.save(file_path, pil_format, **save_kwargs)
+        return file_path
+    
+    def _save_images_parallel(self, images: List[Image.Image], output_dir: str,
+                              prefix: str, image_format: str = None) -> List[str]:
+        """多线程保存图片（编码图片时PIL会释放GIL）
         
         Args:
             images: PIL图片对象列表
+            output_dir: 输出目录路径
             prefix: 文件名前缀
+            image_format: 图片格式，默认使用配置中的值
             
         Returns:
-            保存的图片文件路径列表
+            按页面顺序排列的保存成功的图片文件路径列表
         """
-        saved_paths = []
-        
-        for i, image in enumerate(images, 1):
+        def save_one(item: Tuple[int, Image.Image]) -> Optional[str]:
+            i, image = item
             try:
-                filename = f"{prefix}_{i:04d}.png"
-                file_path = os.path.join(self.temp_dir, filename)
-                
-                # 保存图片
-                image.save(file_path, 'PNG', optimize=True)
-                saved_paths.append(file_path)
-                
+                file_path = self.save_image(
+                    image, os.path.join(output_dir, f"{prefix}_{i:04d}"), image_format
+                )
                 self.logger.debug(f"保存图片: {file_path}")
-                
+                return file_path
             except Exception as e:
                 self.logger.error(f"保存图片失败: {e}")
-                continue
+                return None
+        
+        with ThreadPoolExecutor(max_workers=config.max_workers) as executor:
+            saved_paths = executor.map(save_one, enumerate(images, 1))
+            return [path for path in saved_paths if path]
+    
+    def save_images_to_temp(self, images: List[Image.Image], 
+                          prefix: str = "page") -> List[str]:
+        """将图片保存到临时目录
+        
+        Args:
+            images: PIL图片对象列表
+            prefix: 文件名前缀
+            
+        Returns:
+            保存的图片文件路径列表
+        """
+        # 临时图片用完即删，保存为低压缩级别的PNG：编码快且无损，文件大小无关紧要
+        saved_paths = self._save_images_parallel(images, self.temp_dir, prefix, 'png_fast')
         
         self.logger.info(f"保存了 {len(saved_paths)} 张图片到临时目录")
         return saved_paths
@@ -234,22 +339,8 @@ class PDFProcessor:
         # 确保输出目录存在
         ensure_directory(output_dir)
         
-        saved_paths = []
-        
-        for i, image in enumerate(images, 1):
-            try:
-                filename = f"{prefix}_{i:04d}.png"
-                file_path = os.path.join(output_dir, filename)
-                
-                # 保存图片
-                image.save(file_path, 'PNG', optimize=True)
-                saved_paths.append(file_path)
-                
-                self.logger.info(f"保存图片: {file_path}")
-                
-            except Exception as e:
-                self.logger.error(f"保存图片失败: {e}")
-                continue
+        # 保存图片（格式由配置 image_format 决定）
+        saved_paths = self._save_images_parallel(images, output_dir, prefix)
         
         self.logger.info(f"保存了 {len(saved_paths)} 张图片到目录: {output_dir}")
         return saved_paths
@@ -268,50 +359,96 @@ class PDFProcessor:
             if image.mode != 'L':
                 image = image.convert('L')
             
-            # 如果图片太小，进行放大
+            # 如果图片太小（短边不足1000像素），进行放大；
+            # 双线性插值对识别效果影响不大，速度远快于LANCZOS
             width, height = image.size
-            if width < 1000 or height < 1000:
-                scale_factor = max(1000 / width, 1000 / height)
+            if min(width, height) < 1000:
+                scale_factor = 1000 / min(width, height)
                 new_width = int(width * scale_factor)
                 new_height = int(height * scale_factor)
-                image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+                image = image.resize((new_width, new_height), Image.Resampling.BILINEAR)
                 self.logger.debug(f"图片放大: {width}x{height} -> {new_width}x{new_height}")
             
+            # 二值化为1位图，缩小临时文件并省去Tesseract内部的阈值处理
+            if config.binarize:
+                threshold = self._otsu_threshold(image.histogram())
+                lut = [255 if p > threshold else 0 for p in range(256)]
+                image = image.point(lut, mode='1')
+            
             return image
             
         except Exception as e:
             self.logger.warning(f"图片优化失败: {e}，使用原图")
             return image
     
-    def batch_convert_pdf(self, pdf_path: str, batch_size: int = 5) -> List[List[Image.Image]]:
+    @staticmethod
+    def _otsu_threshold(histogram: List[int]) -> int:
+        """使用Otsu方法根据灰度直方图计算二值化阈值
+        
+        Args:
+            histogram: 256级灰度直方图
+            
+        Returns:
+            阈值，大于该值的像素视为背景
+        """
+        total = sum(histogram)
+        sum_all = sum(i * count for i, count in enumerate(histogram))
+        
+        sum_bg = 0
+        weight_bg = 0
+        best_threshold = 0
+        best_variance = -1.0
+        
+        for t, count in enumerate(histogram):
+            weight_bg += count
+            if weight_bg == 0:
+                continue
+            weight_fg = total - weight_bg
+            if weight_fg == 0:
+                break
+            
+            sum_bg += t * count
+            mean_bg = sum_bg / weight_bg
+            mean_fg = (sum_all - sum_bg) / weight_fg
+            # 类间方差最大的阈值
+            variance = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+            if variance > best_variance:
+                best_variance = variance
+                best_threshold = t
+        
+        return best_threshold
+    
+    def batch_convert_pdf(self, pdf_path: str, batch_size: int = 5) -> Iterator[Tuple[str, int]]:
         """批量转换PDF页面
         
+        页面分批渲染为临时目录中的图片文件，逐页产出文件路径，不在内存中保留图片。
+        
         Args:
             pdf_path: PDF文件路径
             batch_size: 每批处理的页面数
             
-        Returns:
-            分批的图片列表
+        Yields:
+            (图片文件路径, 页码)
         """
         pdf_info = self.get_pdf_info(pdf_path)
         if not pdf_info:
-            return []
+            return
         
         total_pages = pdf_info['total_pages']
-        batches = []
+        ensure_directory(self.temp_dir)
         
         for start_page in range(1, total_pages + 1, batch_size):
             end_page = min(start_page + batch_size - 1, total_pages)
             
             try:
-                batch_images = self.convert_pdf_to_images(
-                    pdf_path, page_range=(start_page, end_page)
+                image_paths = self._render_pages(
+                    pdf_path, config.ocr_dpi, start_page, end_page, self.temp_dir
                 )
-                batches.append(batch_images)
                 self.logger.info(f"完成批次: 页面 {start_page}-{end_page}")
                 
             except FileProcessError as e:
                 self.logger.error(f"批次处理失败: 页面 {start_page}-{end_page}, 错误: {e}")
                 continue
-        
-        return batches
\ No newline at end of file
+            
+            for offset, image_path in enumerate(image_paths):
+                yield image_path, start_page + offset
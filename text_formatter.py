@@ -8,7 +8,7 @@
 import os
 import logging
 import re
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple, Union
 from datetime import datetime
 from utils import ensure_directory, safe_filename, FileProcessError
 from config import config
@@ -16,10 +16,30 @@ from config import config
 try:
     from docx import Document
     from docx.shared import Inches
+    from docx.oxml import OxmlElement
+    from docx.oxml.ns import qn
     DOCX_AVAILABLE = True
 except ImportError:
     DOCX_AVAILABLE = False
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+# 简单的标题检测规则：章节、数字编号、中文编号、括号编号
+_TITLE_RE = re.compile(
+    r'^(?:第[一二三四五六七八九十\d]+[章节]'
+    r'|\d+[.．]'
+    r'|[一二三四五六七八九十]、'
+    r'|\([一二三四五六七八九十\d]+\))'
+)
+
+# 连续空白字符
+_WHITESPACE_RE = re.compile(r'\s+')
+
 
 class TextFormatter:
     """文本格式化器类"""
@@ -42,10 +62,22 @@ class TextFormatter:
         Returns:
             格式化后的文本
         """
-        if not ocr_results:
-            return ""
+        return '\n'.join(self.iter_formatted_pages(ocr_results, preserve_page_breaks))
+    
+    def iter_formatted_pages(self, ocr_results: List[Dict[str, Any]], 
+                             preserve_page_breaks: bool = True) -> Iterator[str]:
+        """逐页生成格式化后的文本片段，用换行连接即为 format_ocr_results 的结果
         
-        formatted_lines = []
+        保存时直接逐段写出，无需在内存中拼接完整文本
+        
+        Args:
+            ocr_results: OCR结果列表
+            preserve_page_breaks: 是否保留分页符
+            
+        Yields:
+            格式化后的文本片段（页面标识、页面正文、提示信息）
+        """
+        multiple_pages = len(ocr_results) > 1
         
         for i, result in enumerate(ocr_results):
             page_number = result.get('page_number', i + 1)
@@ -53,22 +85,19 @@ class TextFormatter:
             confidence = result.get('confidence', 0)
             
             # 添加页面标识（如果需要）
-            if preserve_page_breaks and len(ocr_results) > 1:
-                formatted_lines.append(f"\n--- 第 {page_number} 页 ---\n")
+            if preserve_page_breaks and multiple_pages:
+                yield f"\n--- 第 {page_number} 页 ---\n"
             
-            # 处理文本内容
-            if text.strip():
+            # 处理文本内容（isspace不复制文本，比strip()判空更省）
+            if text and not text.isspace():
                 # 格式化文本
-                formatted_text = self._format_text_content(text)
-                formatted_lines.append(formatted_text)
+                yield self._format_text_content(text)
                 
                 # 添加置信度信息（如果置信度较低）
                 if confidence < config.confidence_threshold:
-                    formatted_lines.append(f"\n[注意: 此页识别置信度较低 ({confidence:.1f}%)]\n")
+                    yield f"\n[注意: 此页识别置信度较低 ({confidence:.1f}%)]\n"
             else:
-                formatted_lines.append("[此页无法识别文字内容]\n")
-        
-        return '\n'.join(formatted_lines)
+                yield "[此页无法识别文字内容]\n"
     
     def _format_text_content(self, text: str) -> str:
         """格式化文本内容
@@ -87,26 +116,23 @@ class TextFormatter:
         
         if not self.preserve_formatting:
             # 简单格式化：移除多余空白
-            text = re.sub(r'\s+', ' ', text)
+            text = _WHITESPACE_RE.sub(' ', text)
             return text
         
-        # 保持格式化：智能段落处理
-        lines = text.split('\n')
-        formatted_lines = []
+        # 保持格式化：智能段落处理，每行标记为标题或正文
+        items = []
         
-        for line in lines:
+        for line in text.split('\n'):
             line = line.strip()
             if not line:
                 continue
             
             # 检测是否为标题（简单规则）
-            if self._is_title_line(line):
-                formatted_lines.append(f"\n{line}\n")
-            else:
-                formatted_lines.append(line)
+            kind = 'title' if self._is_title_line(line) else 'body'
+            items.append((kind, line))
         
         # 重新组合段落
-        return self._merge_paragraphs(formatted_lines)
+        return self._merge_paragraphs(items)
     
     def _is_title_line(self, line: str) -> bool:
         """判断是否为标题行
@@ -117,50 +143,31 @@ class TextFormatter:
         Returns:
             是否为标题
         """
-        # 简单的标题检测规则
-        title_patterns = [
-            r'^第[一二三四五六七八九十\d]+章',  # 章节
-            r'^第[一二三四五六七八九十\d]+节',  # 节
-            r'^\d+\.',  # 数字编号
-            r'^[一二三四五六七八九十]、',  # 中文编号
-            r'^\([一二三四五六七八九十\d]+\)',  # 括号编号
-        ]
-        
-        for pattern in title_patterns:
-            if re.match(pattern, line):
-                return True
-        
         # 短行且全大写可能是标题
-        if len(line) < 50 and line.isupper():
-            return True
-        
-        return False
+        return bool(_TITLE_RE.match(line)) or (len(line) < 50 and line.isupper())
     
-    def _merge_paragraphs(self, lines: List[str]) -> str:
+    def _merge_paragraphs(self, items: List[Tuple[str, str]]) -> str:
         """合并段落
         
         Args:
-            lines: 文本行列表
+            items: (类型, 文本行) 列表，类型为 'title' 或 'body'
             
         Returns:
             合并后的文本
         """
-        if not lines:
+        if not items:
             return ""
         
         paragraphs = []
         current_paragraph = []
         
-        for line in lines:
-            if not line.strip():
-                continue
-            
+        for kind, line in items:
             # 如果是标题行，结束当前段落
-            if line.startswith('\n') and line.endswith('\n'):
+            if kind == 'title':
                 if current_paragraph:
                     paragraphs.append(' '.join(current_paragraph))
                     current_paragraph = []
-                paragraphs.append(line.strip())
+                paragraphs.append(line)
             else:
                 current_paragraph.append(line)
         
@@ -170,12 +177,12 @@ class TextFormatter:
         
         return '\n\n'.join(paragraphs)
     
-    def save_as_txt(self, text: str, output_path: str, 
+    def save_as_txt(self, text: Union[str, Iterable[str]], output_path: str, 
                    add_metadata: bool = True) -> bool:
         """保存为TXT文件
         
         Args:
-            text: 文本内容
+            text: 文本内容，或以换行连接的文本片段序列（逐段写出）
             output_path: 输出路径
             add_metadata: 是否添加元数据
             
@@ -183,14 +190,15 @@ class TextFormatter:
             保存是否成功
         """
         try:
-            content = text
-            
-            if add_metadata:
-                metadata = self._generate_metadata()
-                content = f"{metadata}\n\n{'-' * 50}\n\n{text}"
-            
             with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+                if add_metadata:
+                    metadata = self._generate_metadata()
+                    f.write(f"{metadata}\n\n{'-' * 50}\n\n")
+                
+                for i, chunk in enumerate(self._iter_chunks(text)):
+                    if i:
+                        f.write('\n')
+                    f.write(chunk)
             
             self.logger.info(f"文本已保存为: {output_path}")
             return True
@@ -199,12 +207,12 @@ class TextFormatter:
             self.logger.error(f"保存TXT文件失败: {e}")
             return False
     
-    def save_as_docx(self, text: str, output_path: str, 
+    def save_as_docx(self, text: Union[str, Iterable[str]], output_path: str, 
                     add_metadata: bool = True) -> bool:
         """保存为DOCX文件
         
         Args:
-            text: 文本内容
+            text: 文本内容，或以换行连接的文本片段序列（逐段写出）
             output_path: 输出路径
             add_metadata: 是否添加元数据
             
@@ -218,21 +226,25 @@ class TextFormatter:
         try:
             doc = Document()
             
+            # 直接构建段落XML插入文档主体（位于节属性sectPr之前），
+            # 不为每个段落创建Paragraph对象和查找样式
+            body = doc.element.body
+            sect_pr = body.find(qn('w:sectPr'))
+            insert = sect_pr.addprevious if sect_pr is not None else body.append
+            
             # 添加元数据
             if add_metadata:
                 metadata = self._generate_metadata()
-                doc.add_paragraph(metadata)
-                doc.add_paragraph('-' * 50)
+                insert(self._make_docx_paragraph(metadata))
+                insert(self._make_docx_paragraph('-' * 50))
             
             # 添加文本内容
-            paragraphs = text.split('\n\n')
-            for paragraph_text in paragraphs:
-                if paragraph_text.strip():
+            for paragraph_text in self._iter_paragraphs(text):
+                paragraph_text = paragraph_text.strip()
+                if paragraph_text:
                     # 检测标题
-                    if self._is_title_line(paragraph_text.strip()):
-                        doc.add_heading(paragraph_text.strip(), level=2)
-                    else:
-                        doc.add_paragraph(paragraph_text.strip())
+                    style = 'Heading2' if self._is_title_line(paragraph_text) else None
+                    insert(self._make_docx_paragraph(paragraph_text, style))
             
             doc.save(output_path)
             self.logger.info(f"文档已保存为: {output_path}")
@@ -242,6 +254,74 @@ class TextFormatter:
             self.logger.error(f"保存DOCX文件失败: {e}")
             return False
     
+    @staticmethod
+    def _iter_chunks(text: Union[str, Iterable[str]]) -> Iterable[str]:
+        """将文本统一为文本片段序列
+        
+        Args:
+            text: 文本内容或文本片段序列
+            
+        Returns:
+            文本片段序列
+        """
+        return (text,) if isinstance(text, str) else text
+    
+    def _iter_paragraphs(self, text: Union[str, Iterable[str]]) -> Iterator[str]:
+        """按空行切分段落，结果与对完整文本执行 split('\\n\\n') 相同
+        
+        Args:
+            text: 文本内容，或以换行连接的文本片段序列
+            
+        Yields:
+            段落文本（未去除首尾空白）
+        """
+        pending = None
+        for chunk in self._iter_chunks(text):
+            # 上一片段末尾未结束的段落与当前片段拼接后再切分
+            buffer = chunk if pending is None else f"{pending}\n{chunk}"
+            *paragraphs, pending = buffer.split('\n\n')
+            yield from paragraphs
+        
+        if pending is not None:
+            yield pending
+    
+    @staticmethod
+    def _make_docx_paragraph(text: str, style_id: str = None):
+        """构建DOCX段落元素 <w:p>
+        
+        Args:
+            text: 段落文本，其中的换行转换为段内换行 <w:br/>，制表符转换为 <w:tab/>
+            style_id: 段落样式ID（如 'Heading2'），None表示正文
+            
+        Returns:
+            段落XML元素
+        """
+        paragraph = OxmlElement('w:p')
+        
+        if style_id:
+            properties = OxmlElement('w:pPr')
+            style = OxmlElement('w:pStyle')
+            style.set(qn('w:val'), style_id)
+            properties.append(style)
+            paragraph.append(properties)
+        
+        # 与 python-docx 的 run.text 一致：换行转为 <w:br/>，制表符转为 <w:tab/>
+        run = OxmlElement('w:r')
+        for i, line in enumerate(text.split('\n')):
+            if i:
+                run.append(OxmlElement('w:br'))
+            for j, segment in enumerate(line.split('\t')):
+                if j:
+                    run.append(OxmlElement('w:tab'))
+                if segment:
+                    text_element = OxmlElement('w:t')
+                    text_element.set(qn('xml:space'), 'preserve')
+                    text_element.text = segment
+                    run.append(text_element)
+        paragraph.append(run)
+        
+        return paragraph
+    
     def _generate_metadata(self) -> str:
         """生成元数据
         
@@ -255,12 +335,12 @@ class TextFormatter:
 识别语言: {config.ocr_language}
 识别DPI: {config.ocr_dpi}"""
     
-    def save_text(self, text: str, output_path: str, 
+    def save_text(self, text: Union[str, Iterable[str]], output_path: str, 
                  format_type: str = None) -> bool:
         """保存文本到文件
         
         Args:
-            text: 文本内容
+            text: 文本内容，或以换行连接的文本片段序列（如 iter_formatted_pages 的结果）
             output_path: 输出路径
             format_type: 输出格式 ('txt', 'docx')
             
@@ -303,19 +383,37 @@ class TextFormatter:
         """
         try:
             total_pages = len(ocr_results)
-            total_chars = sum(r.get('char_count', 0) for r in ocr_results)
-            total_words = sum(r.get('word_count', 0) for r in ocr_results)
-            avg_confidence = sum(r.get('confidence', 0) for r in ocr_results) / total_pages if total_pages > 0 else 0
-            
-            # 统计低置信度页面
-            low_confidence_pages = [
-                r.get('page_number', i+1) 
-                for i, r in enumerate(ocr_results) 
-                if r.get('confidence', 0) < config.confidence_threshold
-            ]
-            
-            # 生成报告
-            report = f"""PDF OCR 处理摘要报告
+            threshold = config.confidence_threshold
+            
+            # 单次遍历同时累计统计、收集低置信度页面和每页详情
+            total_chars = 0
+            total_words = 0
+            confidence_sum = 0
+            low_confidence_pages = []
+            lines = []
+            for i, result in enumerate(ocr_results):
+                confidence = result.get('confidence', 0)
+                char_count = result.get('char_count', 0)
+                word_count = result.get('word_count', 0)
+                
+                total_chars += char_count
+                total_words += word_count
+                confidence_sum += confidence
+                
+                if confidence < threshold:
+                    low_confidence_pages.append(result.get('page_number', i+1))
+                    status = "低置信度"
+                else:
+                    status = "正常"
+                if 'error' in result:
+                    status = "错误"
+                
+                lines.append(f"第 {result.get('page_number', 0)} 页: {char_count} 字符, {word_count} 词, 置信度 {confidence:.1f}% ({status})\n")
+            
+            avg_confidence = confidence_sum / total_pages if total_pages > 0 else 0
+            
+            # 生成报告头部
+            header = f"""PDF OCR 处理摘要报告
 {'=' * 50}
 
 处理时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
@@ -342,22 +440,10 @@ class TextFormatter:
 {'-' * 30}
 """
             
-            # 添加每页详情
-            for result in ocr_results:
-                page_num = result.get('page_number', 0)
-                confidence = result.get('confidence', 0)
-                char_count = result.get('char_count', 0)
-                word_count = result.get('word_count', 0)
-                
-                status = "正常" if confidence >= config.confidence_threshold else "低置信度"
-                if 'error' in result:
-                    status = "错误"
-                
-                report += f"第 {page_num} 页: {char_count} 字符, {word_count} 词, 置信度 {confidence:.1f}% ({status})\n"
-            
             # 保存报告
             with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(report)
+                f.write(header)
+                f.writelines(lines)
             
             self.logger.info(f"摘要报告已保存: {output_path}")
             return True
@@ -380,17 +466,30 @@ class TextFormatter:
         """
         try:
             if format_type.lower() == 'json':
-                import json
-                with open(output_path, 'w', encoding='utf-8') as f:
-                    json.dump(ocr_results, f, ensure_ascii=False, indent=2)
+                if ORJSON_AVAILABLE:
+                    data = orjson.dumps(list(ocr_results),
+                                        option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+                else:
+                    import json
+                    data = json.dumps(list(ocr_results), ensure_ascii=False, indent=2).encode('utf-8')
+                with open(output_path, 'wb') as f:
+                    f.write(data)
             
             elif format_type.lower() == 'csv':
                 import csv
-                with open(output_path, 'w', newline='', encoding='utf-8') as f:
+                with open(output_path, 'w', newline='', encoding='utf-8', buffering=1 << 20) as f:
                     if ocr_results:
-                        writer = csv.DictWriter(f, fieldnames=ocr_results[0].keys())
-                        writer.writeheader()
-                        writer.writerows(ocr_results)
+                        # 表头取所有记录键的并集（按首次出现的顺序），如只在部分页面出现的 error；
+                        # 固定列顺序后逐行展开为元组，绕开DictWriter的逐字段字典处理
+                        fields = {}
+                        for r in ocr_results:
+                            fields.update(dict.fromkeys(r))
+                        fields = list(fields)
+                        writer = csv.writer(f)
+                        writer.writerow(fields)
+                        writer.writerows(
+                            tuple(r.get(k, '') for k in fields) for r in ocr_results
+                        )
             
             else:
                 self.logger.error(f"不支持的导出格式: {format_type}")
@@ -6,10 +6,13 @@
 """
 
 import os
+import queue
 import shutil
+import sys
 import logging
+import threading
 from pathlib import Path
-from typing import Optional, List
+from typing import Optional, List, Iterable, Iterator
 
 
 def setup_logging(log_level: str = "INFO") -> logging.Logger:
@@ -88,12 +91,13 @@ def cleanup_directory(directory: str, keep_directory: bool = True) -> bool:
     try:
         if os.path.exists(directory):
             if keep_directory:
-                for filename in os.listdir(directory):
-                    file_path = os.path.join(directory, filename)
-                    if os.path.isfile(file_path):
-                        os.unlink(file_path)
-                    elif os.path.isdir(file_path):
-                        shutil.rmtree(file_path)
+                # scandir的目录项自带类型信息，无需为每个文件单独stat
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            shutil.rmtree(entry.path)
+                        else:
+                            os.unlink(entry.path)
             else:
                 shutil.rmtree(directory)
         return True
@@ -139,6 +143,10 @@ def generate_output_filename(input_path: str, output_dir: str,
     return os.path.join(output_dir, output_filename)
 
 
+# 文件名中不安全字符的替换表
+_UNSAFE_FILENAME_TABLE = str.maketrans({char: '_' for char in '<>:"/\\|?*'})
+
+
 def safe_filename(filename: str) -> str:
     """生成安全的文件名
     
@@ -148,17 +156,8 @@ def safe_filename(filename: str) -> str:
     Returns:
         安全的文件名
     """
-    # 移除或替换不安全的字符
-    unsafe_chars = '<>:"/\\|?*'
-    safe_name = filename
-    for char in unsafe_chars:
-        safe_name = safe_name.replace(char, '_')
-    
-    # 限制文件名长度
-    if len(safe_name) > 200:
-        safe_name = safe_name[:200]
-    
-    return safe_name
+    # 一次性替换不安全的字符，并限制文件名长度
+    return filename.translate(_UNSAFE_FILENAME_TABLE)[:200]
 
 
 def format_time(seconds: float) -> str:
@@ -180,6 +179,10 @@ def format_time(seconds: float) -> str:
         return f"{hours:.1f}小时"
 
 
+# 上次绘制的进度条状态 (前缀, 总数, 百分比整数)
+_progress_state = [None]
+
+
 def print_progress_bar(current: int, total: int, prefix: str = "进度", 
                       suffix: str = "完成", length: int = 50) -> None:
     """打印进度条
@@ -192,12 +195,74 @@ def print_progress_bar(current: int, total: int, prefix: str = "进度",
         length: 进度条长度
     """
     percent = (current / total) * 100
+    
+    # 百分比整数部分不变时不重绘，完成时总是输出
+    state = (prefix, total, int(percent))
+    if state == _progress_state[0] and current != total:
+        return
+    _progress_state[0] = state
+    
     filled_length = int(length * current // total)
     bar = '█' * filled_length + '-' * (length - filled_length)
-    print(f'\r{prefix} |{bar}| {current}/{total} ({percent:.1f}%) {suffix}', end='\r')
+    end = '\n' if current == total else '\r'  # 完成时换行
+    sys.stdout.write(f'\r{prefix} |{bar}| {current}/{total} ({percent:.1f}%) {suffix}{end}')
+    sys.stdout.flush()
+
+
+def iter_in_thread(iterable: Iterable, maxsize: int = 4) -> Iterator:
+    """在后台线程中迭代，通过有界队列逐个产出元素
+    
+    上游生产和下游消费可以同时进行，队列满时生产线程等待，
+    内存中最多保留 maxsize 个未消费的元素。
     
-    if current == total:
-        print()  # 换行
+    Args:
+        iterable: 被迭代的对象（在后台线程中消费）
+        maxsize: 队列最大长度
+        
+    Yields:
+        iterable 中的元素，顺序不变
+        
+    Raises:
+        后台线程迭代时抛出的异常会在消费端重新抛出
+    """
+    items = queue.Queue(maxsize=maxsize)
+    stopped = threading.Event()
+    done = object()
+    
+    def put(item) -> bool:
+        # 消费端提前退出时不再阻塞
+        while not stopped.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+        except BaseException as e:
+            put((done, e))
+            return
+        put((done, None))
+    
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    
+    try:
+        while True:
+            item, error = items.get()
+            if item is done:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stopped.set()
+        thread.join()
 
 
 class OCRError(Exception):